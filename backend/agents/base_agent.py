@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import asyncio
 import datetime
 from ..models.interview import AgentMessage
@@ -7,6 +7,9 @@ from ..models.interview import AgentMessage
 class BaseAgent(ABC):
     """Base class for all AI agents"""
     
+    # Attributes saved with the session snapshot and restored onto a fresh agent
+    state_fields: Tuple[str, ...] = ("initialized",)
+    
     def __init__(self, session_id: str):
         self.session_id = session_id
         self.agent_name = self.__class__.__name__
@@ -22,6 +25,16 @@ class BaseAgent(ABC):
             metadata=metadata or {}
         )
     
+    def export_state(self) -> Dict[str, Any]:
+        """Per-session state to keep when the session leaves memory"""
+        return {name: getattr(self, name) for name in self.state_fields}
+    
+    def import_state(self, state: Dict[str, Any]):
+        """Restore state saved by export_state"""
+        for name in self.state_fields:
+            if name in state:
+                setattr(self, name, state[name])
+    
     @abstractmethod
     async def initialize(self, config: Any) -> AgentMessage:
         """Initialize the agent with configuration"""
@@ -2,64 +2,68 @@ import asyncio
 import random
 from typing import Dict, Any, List
 from textblob import TextBlob
-import openai
-import os
 from .base_agent import BaseAgent
 from ..models.interview import AgentMessage, BehavioralResponse
+from ..services.openai_client import get_openai_client
+
+# Held once per process and shared by every session's agent; treat as read-only
+QUESTION_BANK = (
+    {
+        "id": 1,
+        "question": "Tell me about a time when you had to work with a difficult team member. How did you handle the situation?",
+        "category": "Teamwork",
+        "competencies": ["collaboration", "conflict_resolution", "communication"],
+        "follow_up": "What would you do differently if faced with a similar situation?"
+    },
+    {
+        "id": 2,
+        "question": "Describe a situation where you had to learn a new technology quickly to complete a project. What was your approach?",
+        "category": "Learning Agility",
+        "competencies": ["adaptability", "learning", "problem_solving"],
+        "follow_up": "How do you typically stay updated with new technologies?"
+    },
+    {
+        "id": 3,
+        "question": "Give me an example of a time when you had to make a decision with incomplete information. What was the outcome?",
+        "category": "Decision Making",
+        "competencies": ["decision_making", "risk_assessment", "leadership"],
+        "follow_up": "How do you typically handle uncertainty in your work?"
+    },
+    {
+        "id": 4,
+        "question": "Tell me about a project where you had to meet a tight deadline. How did you manage your time and resources?",
+        "category": "Time Management",
+        "competencies": ["time_management", "prioritization", "stress_management"],
+        "follow_up": "What tools or techniques do you use for project management?"
+    },
+    {
+        "id": 5,
+        "question": "Describe a situation where you had to give constructive feedback to a colleague. How did you approach it?",
+        "category": "Leadership",
+        "competencies": ["leadership", "communication", "empathy"],
+        "follow_up": "How do you handle receiving feedback yourself?"
+    }
+)
 
 class BehavioralAgent(BaseAgent):
     """Handles behavioral interview questions using STAR methodology"""
     
+    state_fields = BaseAgent.state_fields + ("questions_asked", "responses_collected", "question_bank")
+    
     def __init__(self, session_id: str):
         super().__init__(session_id)
-        self.openai_client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.questions_asked = []
         self.responses_collected = []
         
-        self.question_bank = [
-            {
-                "id": 1,
-                "question": "Tell me about a time when you had to work with a difficult team member. How did you handle the situation?",
-                "category": "Teamwork",
-                "competencies": ["collaboration", "conflict_resolution", "communication"],
-                "follow_up": "What would you do differently if faced with a similar situation?"
-            },
-            {
-                "id": 2,
-                "question": "Describe a situation where you had to learn a new technology quickly to complete a project. What was your approach?",
-                "category": "Learning Agility",
-                "competencies": ["adaptability", "learning", "problem_solving"],
-                "follow_up": "How do you typically stay updated with new technologies?"
-            },
-            {
-                "id": 3,
-                "question": "Give me an example of a time when you had to make a decision with incomplete information. What was the outcome?",
-                "category": "Decision Making",
-                "competencies": ["decision_making", "risk_assessment", "leadership"],
-                "follow_up": "How do you typically handle uncertainty in your work?"
-            },
-            {
-                "id": 4,
-                "question": "Tell me about a project where you had to meet a tight deadline. How did you manage your time and resources?",
-                "category": "Time Management",
-                "competencies": ["time_management", "prioritization", "stress_management"],
-                "follow_up": "What tools or techniques do you use for project management?"
-            },
-            {
-                "id": 5,
-                "question": "Describe a situation where you had to give constructive feedback to a colleague. How did you approach it?",
-                "category": "Leadership",
-                "competencies": ["leadership", "communication", "empathy"],
-                "follow_up": "How do you handle receiving feedback yourself?"
-            }
-        ]
+        # Shared and read-only; initialize() gives each session its own shuffled order
+        self.question_bank = QUESTION_BANK
     
     async def initialize(self, config: Any) -> AgentMessage:
         """Initialize behavioral assessment"""
         await self.log_activity("Initializing behavioral assessment")
         
         # Randomize question order to prevent memorization
-        random.shuffle(self.question_bank)
+        self.question_bank = random.sample(QUESTION_BANK, len(QUESTION_BANK))
         
         self.initialized = True
         
@@ -229,7 +233,7 @@ class BehavioralAgent(BaseAgent):
         
         try:
             response = await asyncio.to_thread(
-                self.openai_client.chat.completions.create,
+                get_openai_client().chat.completions.create,
                 model="gpt-4",
                 messages=[{"role": "user", "content": prompt}],
                 temperature=0.3
@@ -0,0 +1,93 @@
+import datetime
+import os
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from .base_agent import BaseAgent
+from ..models.interview import AgentMessage, CodingResult
+
+class CodingAgent(BaseAgent):
+    """Runs the candidate's code against test cases and keeps the run history"""
+    
+    state_fields = BaseAgent.state_fields + ("executions", "final_submissions")
+    
+    def __init__(self, session_id: str, judge0_service):
+        super().__init__(session_id)
+        self.judge0_service = judge0_service
+        self.executions: List[Dict[str, Any]] = []
+        
+        # Final submissions run ahead of practice runs; the server decides which is
+        # which, and each session gets only a few at that priority
+        self.max_final_submissions = int(os.getenv("CODING_MAX_FINAL_SUBMISSIONS", "3"))
+        self.final_submissions = 0
+    
+    async def initialize(self, config: Any) -> AgentMessage:
+        """Initialize the coding assessment"""
+        await self.log_activity("Initializing coding assessment")
+        self.initialized = True
+        
+        return await self.send_message(
+            "system",
+            "Coding assessment initialized. Ready to execute submissions.",
+            {"languages": list(self.judge0_service.language_ids)}
+        )
+    
+    async def handle_message(self, action: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Handle coding agent actions"""
+        if action == "execute_code":
+            return await self.execute_code(payload)
+        elif action == "submit_code":
+            return await self.execute_code(payload, final=True)
+        elif action == "get_history":
+            return {"executions": self.executions}
+        else:
+            return {"error": f"Unknown action: {action}"}
+    
+    async def execute_code(self, payload: Dict[str, Any],
+                           on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                           final: bool = False) -> Dict[str, Any]:
+        """Execute the submission, calling on_result as each test case finishes.
+        
+        final marks a "submit_code" request; any priority in the payload is ignored.
+        """
+        language = payload.get("language", "python")
+        priority = "practice"
+        if final and self.final_submissions < self.max_final_submissions:
+            self.final_submissions += 1
+            priority = "submission"
+        
+        execution = await self.judge0_service.execute_code(
+            payload.get("source_code", payload.get("code", "")),
+            language,
+            payload.get("test_cases", []),
+            payload.get("time_limit", 5),
+            on_result=on_result,
+            session_id=self.session_id,
+            priority=priority
+        )
+        
+        if "summary" in execution:
+            self.record_execution(language, execution, final)
+            await self.log_activity("Code executed", {
+                "language": language,
+                "passed": execution["summary"]["passed"],
+                "total": execution["summary"]["total"]
+            })
+        return execution
+    
+    def record_execution(self, language: str, execution: Dict[str, Any], final: bool = False):
+        """Add a finished run to the history used for scoring and feedback"""
+        summary = execution["summary"]
+        result = CodingResult(
+            pass_rate=summary["pass_rate"],
+            exec_time_ms=int(summary["avg_execution_time"] * 1000),
+            stderr=execution.get("compile_error") or next((r.get("error", "") for r in execution.get("results", []) if r.get("error")), ""),
+            passed=summary["passed"],
+            total=summary["total"],
+            memory_usage=summary["max_memory_usage"]
+        )
+        self.executions.append({
+            "language": language,
+            "final": final,
+            "status": summary["overall_status"],
+            "result": result.dict(),
+            "timestamp": datetime.datetime.now().isoformat()
+        })
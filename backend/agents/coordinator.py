@@ -6,6 +6,8 @@ from ..models.interview import InterviewConfig, AgentMessage
 class CoordinatorAgent(BaseAgent):
     """Coordinates the entire interview session"""
     
+    state_fields = BaseAgent.state_fields + ("current_phase_index",)
+    
     def __init__(self, session_id: str):
         super().__init__(session_id)
         self.phase_sequence = ["introduction", "behavioral", "coding", "analysis", "feedback"]
@@ -0,0 +1,52 @@
+from collections.abc import Mapping
+from typing import Dict, Any, Callable, Iterator, List, Optional
+
+AgentFactory = Callable[[str], Any]
+
+class AgentRegistry(Mapping):
+    """A session's agents, each built on first access.
+    
+    Reads like the dict sessions used to hold, so `session.agents["coding"]`
+    and `"coding" in session.agents` work unchanged; an agent the interview
+    never reaches is never constructed. A registry rebuilt from a snapshot
+    hands each agent its saved state when the agent is first built.
+    """
+    
+    def __init__(self, session_id: str, factories: Dict[str, AgentFactory],
+                 state: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.session_id = session_id
+        self.factories = factories
+        self.instances: Dict[str, Any] = {}
+        self.saved_state: Dict[str, Dict[str, Any]] = dict(state or {})
+    
+    def __getitem__(self, name: str) -> Any:
+        agent = self.instances.get(name)
+        if agent is None:
+            if name not in self.factories:
+                raise KeyError(name)
+            agent = self.instances[name] = self.factories[name](self.session_id)
+            saved = self.saved_state.pop(name, None)
+            if saved is not None:
+                agent.import_state(saved)
+        return agent
+    
+    def __contains__(self, name: object) -> bool:
+        return name in self.factories
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.factories)
+    
+    def __len__(self) -> int:
+        return len(self.factories)
+    
+    def export_state(self) -> Dict[str, Dict[str, Any]]:
+        """State of every agent, including restored state no one has asked for yet"""
+        state = dict(self.saved_state)
+        for name, agent in self.instances.items():
+            state[name] = agent.export_state()
+        return state
+    
+    @property
+    def loaded(self) -> List[str]:
+        """Names of the agents constructed so far"""
+        return list(self.instances)
@@ -1,9 +1,8 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 import asyncio
-import json
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Callable, Awaitable, Union
 import os
 from dotenv import load_dotenv
 
@@ -13,10 +12,15 @@ from .agents.coding import CodingAgent
 from .agents.analysis import AnalysisAgent
 from .agents.feedback import FeedbackAgent
 from .agents.avatar import AvatarAgent
+from .agents.registry import AgentRegistry
 from .models.interview import InterviewConfig, InterviewSession, AgentMessage
 from .services.judge0 import Judge0Service
 from .services.vector_db import VectorDBService
 from .services.livekit import LiveKitService
+from .services.session_store import create_session_store
+from .services.sharding import ShardMap
+from .services.message_pipeline import MessagePipeline
+from .services.wire_format import negotiate
 
 # Load environment variables
 load_dotenv()
@@ -36,30 +40,80 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global session storage (in production, use Redis or database)
-active_sessions: Dict[str, InterviewSession] = {}
-
 # Initialize services
 judge0_service = Judge0Service()
 vector_db_service = VectorDBService()
 livekit_service = LiveKitService()
 
+# How to build each agent; services are shared, so an agent only carries its own session state
+AGENT_FACTORIES = {
+    "coordinator": CoordinatorAgent,
+    "behavioral": BehavioralAgent,
+    "coding": lambda session_id: CodingAgent(session_id, judge0_service),
+    "analysis": lambda session_id: AnalysisAgent(session_id, vector_db_service),
+    "feedback": FeedbackAgent,
+    "avatar": lambda session_id: AvatarAgent(session_id, livekit_service)
+}
+
+def build_agents(session: InterviewSession):
+    """Attach an agent registry to a new or restored session; agents are built on first use.
+    
+    A restored session's agents field holds the state its agents exported.
+    """
+    state = session.agents if isinstance(session.agents, dict) else None
+    session.agents = AgentRegistry(session.session_id, AGENT_FACTORIES, state)
+
+# Live sessions are kept in memory only while in use (see SESSION_STORE); completed and
+# idle ones move to the persistent backend, agent state included, and are restored on access
+session_store = create_session_store(restore=build_agents)
+
+# In multi-worker mode (WORKER_URLS) each worker owns the sessions whose id carries its
+# shard; backend.router forwards requests to the owner, and status is shared via the store
+shard_map = ShardMap.from_env()
+if shard_map.multi_worker and judge0_service.callback_url:
+    # Judge0 calls back through the router, which forwards on the shard in the path
+    judge0_service.callback_url = f"{judge0_service.callback_url.rstrip('/')}/{shard_map.shard}"
+
+async def get_owned_session(session_id: str) -> Optional[InterviewSession]:
+    """The session if this worker owns it; 421 when another worker does"""
+    if not shard_map.owns(session_id):
+        raise HTTPException(status_code=421, detail=f"Session is owned by shard {shard_map.shard_of(session_id)}")
+    return await session_store.get(session_id)
+
+async def publish_session_status(session: InterviewSession):
+    if shard_map.multi_worker:
+        await session_store.publish_status(session, owner=shard_map.shard)
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize services on startup"""
+    if shard_map.multi_worker and not (session_store.backend and session_store.backend.shared):
+        # Status requests routed to a non-owner would 404 without a store every worker sees
+        raise RuntimeError("Multi-worker mode needs a shared session store: SESSION_STORE=sqlite, or redis with REDIS_URL")
     print("🚀 Initializing AI Recruiter Platform...")
     await vector_db_service.initialize()
     print("✓ Vector database connected")
+    await judge0_service.start()
     print("✓ Judge0 service ready")
+    session_store.start()
+    if shard_map.multi_worker:
+        print(f"✓ Worker shard {shard_map.shard} of {shard_map.shard_count}")
     print("✓ LiveKit service initialized")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release service resources on shutdown"""
+    await judge0_service.close()
+    await vector_db_service.close()
+    await session_store.close()
+
 @app.get("/")
 async def root():
     return {
         "message": "AI Recruiter Multi-Agent Platform",
         "version": "1.0.0",
         "status": "active",
-        "agents": ["coordinator", "behavioral", "coding", "analysis", "feedback", "avatar"]
+        "agents": list(AGENT_FACTORIES)
     }
 
 @app.post("/api/interview/start")
@@ -68,22 +122,16 @@ async def start_interview(config: InterviewConfig):
     try:
         # Create new session
         session = InterviewSession(
-            session_id=f"session_{len(active_sessions) + 1}",
+            session_id=shard_map.new_session_id(),
             config=config,
             status="active"
         )
         
-        # Initialize agents
-        session.agents = {
-            "coordinator": CoordinatorAgent(session.session_id),
-            "behavioral": BehavioralAgent(session.session_id),
-            "coding": CodingAgent(session.session_id, judge0_service),
-            "analysis": AnalysisAgent(session.session_id, vector_db_service),
-            "feedback": FeedbackAgent(session.session_id),
-            "avatar": AvatarAgent(session.session_id, livekit_service)
-        }
+        # Agents are created lazily as the interview reaches them
+        build_agents(session)
         
-        active_sessions[session.session_id] = session
+        await session_store.put(session)
+        await publish_session_status(session)
         
         # Start coordinator
         initial_message = await session.agents["coordinator"].initialize(config)
@@ -101,34 +149,93 @@ async def start_interview(config: InterviewConfig):
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     """WebSocket endpoint for real-time communication"""
-    await websocket.accept()
+    # JSON text frames unless the client negotiates another format (see wire_format)
+    codec, subprotocol = negotiate(websocket.scope.get("subprotocols", []), websocket.query_params.get("format"))
+    await websocket.accept(subprotocol=subprotocol)
     
-    if session_id not in active_sessions:
-        await websocket.send_text(json.dumps({"error": "Session not found"}))
+    session = await session_store.get(session_id) if shard_map.owns(session_id) else None
+    if session is None:
+        # In the negotiated format; a msgpack client cannot read a JSON text frame
+        data = codec.encode({"error": "Session not found"})
+        if codec.binary:
+            await websocket.send_bytes(data)
+        else:
+            await websocket.send_text(data)
         await websocket.close()
         return
     
-    session = active_sessions[session_id]
+    # Connected sessions stay in memory
+    session_store.pin(session_id)
+    send_lock = asyncio.Lock()
+    
+    connected = True
+    
+    async def send_frame(frame, request_id=None):
+        if not connected:
+            # Handlers finishing after a disconnect still update the session; nothing to send
+            return
+        data = codec.encode(frame, request_id)
+        # Streamed frames may be produced concurrently; keep writes whole
+        async with send_lock:
+            if codec.binary:
+                await websocket.send_bytes(data)
+            else:
+                await websocket.send_text(data)
+    
+    # Messages run concurrently, in order per agent; see MessagePipeline
+    pipeline = MessagePipeline.from_env(lambda message: process_agent_message(session, message, send_frame))
+    replies = set()
+    
+    async def reply(request_id, future: asyncio.Future):
+        try:
+            response = await future
+            await send_frame(response, request_id)
+            await publish_session_status(session)
+        except (asyncio.CancelledError, WebSocketDisconnect, RuntimeError):
+            # Client went away before the reply was ready
+            pass
     
     try:
         while True:
             # Receive message from client
-            data = await websocket.receive_text()
-            message_data = json.loads(data)
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            message_data = codec.decode(message["bytes"] if message.get("bytes") is not None else message["text"])
+            request_id = message_data.get("request_id")
+            
+            if message_data.get("type") == "ping":
+                await send_frame({"type": "pong", "request_id": request_id})
+                continue
             
             # Process message through appropriate agent
-            response = await process_agent_message(session, message_data)
+            future = await pipeline.submit(str(message_data.get("agent")), message_data)
             
-            # Send response back to client
-            await websocket.send_text(json.dumps(response))
+            if request_id is None:
+                # Messages without a request_id keep the one-at-a-time protocol
+                response = await future
+                await send_frame(response)
+                await publish_session_status(session)
+            else:
+                # Replies are correlated by request_id and sent as each one completes
+                task = asyncio.create_task(reply(request_id, future))
+                replies.add(task)
+                task.add_done_callback(replies.discard)
             
     except WebSocketDisconnect:
         print(f"Client disconnected from session {session_id}")
     except Exception as e:
         print(f"WebSocket error: {e}")
-        await websocket.send_text(json.dumps({"error": str(e)}))
+        await send_frame({"error": str(e)})
+    finally:
+        connected = False
+        # Queued messages are dropped; running ones finish so the session stays consistent
+        await pipeline.close()
+        for task in list(replies):
+            task.cancel()
+        session_store.unpin(session_id)
 
-async def process_agent_message(session: InterviewSession, message_data: dict) -> dict:
+async def process_agent_message(session: InterviewSession, message_data: dict, send: Optional[Callable[[dict], Awaitable[None]]] = None) -> Union[dict, AgentMessage]:
     """Process message through the appropriate agent"""
     agent_type = message_data.get("agent")
     action = message_data.get("action")
@@ -144,8 +251,11 @@ async def process_agent_message(session: InterviewSession, message_data: dict) -
             response = await agent.ask_question(payload)
         elif action == "submit_response":
             response = await agent.process_response(payload)
-        elif action == "execute_code":
-            response = await agent.execute_code(payload)
+        elif action in ("execute_code", "submit_code") and payload.get("stream") and send:
+            response = await stream_code_execution(agent, message_data, send)
+        elif action in ("execute_code", "submit_code"):
+            # Priority comes from the action, never from the client payload
+            response = await agent.execute_code(payload, final=action == "submit_code")
         elif action == "analyze_session":
             response = await agent.analyze_session(session.messages)
         elif action == "generate_feedback":
@@ -156,20 +266,43 @@ async def process_agent_message(session: InterviewSession, message_data: dict) -
         # Store message in session
         if isinstance(response, AgentMessage):
             session.messages.append(response)
-            return response.dict()
+            # Returned as the model; the wire codec serializes it without a dict copy
+            return response
         
         return response
         
     except Exception as e:
         return {"error": f"Agent processing failed: {str(e)}"}
 
+async def stream_code_execution(agent: CodingAgent, message_data: dict, send: Callable[[dict], Awaitable[None]]) -> dict:
+    """Run code through the coding agent and push each test case result to the client as soon as it finishes"""
+    request_id = message_data.get("request_id")
+    
+    async def on_result(result: dict):
+        await send({"type": "execution_result", "request_id": request_id, "result": result})
+    
+    execution = await agent.execute_code(
+        message_data.get("payload", {}), on_result=on_result, final=message_data.get("action") == "submit_code"
+    )
+    
+    # Final frame carries the summary (or the single compile error)
+    return {"type": "execution_summary", "request_id": request_id, **execution}
+
 @app.get("/api/interview/{session_id}/status")
 async def get_interview_status(session_id: str):
     """Get current interview status"""
-    if session_id not in active_sessions:
+    if not shard_map.owns(session_id):
+        # Another worker owns it; answer from the status it publishes
+        status = await session_store.load_status(session_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail="Session not found")
+        status.pop("owner", None)
+        return status
+    
+    session = await session_store.get(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = active_sessions[session_id]
     return {
         "session_id": session_id,
         "status": session.status,
@@ -181,16 +314,22 @@ async def get_interview_status(session_id: str):
 @app.post("/api/interview/{session_id}/end")
 async def end_interview(session_id: str):
     """End interview session and generate report"""
-    if session_id not in active_sessions:
+    session = await get_owned_session(session_id)
+    if session is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    session = active_sessions[session_id]
     session.status = "completed"
+    judge0_service.scheduler.forget_session(session_id)
     
     # Generate final report
     feedback_agent = session.agents["feedback"]
     final_report = await feedback_agent.generate_final_report(session)
     
+    # Session vectors are archived or dropped once their retention TTL passes
+    await vector_db_service.complete_session(session_id)
+    await session_store.complete(session_id)
+    await publish_session_status(session)
+    
     return {
         "session_id": session_id,
         "status": "completed",
@@ -209,5 +348,34 @@ async def health_check():
         }
     }
 
+@app.put("/api/judge0/callback")
+async def judge0_callback(request: Request):
+    """Receive finished submissions from Judge0's callback_url"""
+    result = await request.json()
+    return {"accepted": judge0_service.handle_callback(result)}
+
+@app.put("/api/judge0/callback/{shard}")
+async def judge0_shard_callback(shard: int, request: Request):
+    """Receive finished submissions for the runs of one worker shard"""
+    if shard != shard_map.shard:
+        raise HTTPException(status_code=421, detail=f"Callback is for shard {shard}")
+    result = await request.json()
+    return {"accepted": judge0_service.handle_callback(result)}
+
+@app.get("/api/judge0/stats")
+async def judge0_stats():
+    """Judge0 execution service statistics for this worker (backend.router gathers all workers)"""
+    return judge0_service.get_stats()
+
+@app.get("/api/sessions/stats")
+async def session_stats():
+    """Session store occupancy and eviction counters for this worker"""
+    return session_store.stats()
+
+@app.get("/api/vector_db/memory")
+async def vector_db_memory():
+    """Memory held by per-session vector data on this worker"""
+    return vector_db_service.memory_report()
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
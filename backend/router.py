@@ -0,0 +1,150 @@
+import asyncio
+import itertools
+import re
+from typing import Optional
+
+import aiohttp
+from fastapi import FastAPI, Request, WebSocket
+from fastapi.responses import JSONResponse, Response
+from dotenv import load_dotenv
+
+from .services.sharding import ShardMap
+
+# Load environment variables
+load_dotenv()
+
+app = FastAPI(
+    title="AI Recruiter Session Router",
+    description="Routes each interview session to the worker that owns it",
+    version="1.0.0"
+)
+
+shard_map = ShardMap.from_env()
+# New sessions are spread across workers in turn
+next_worker = itertools.cycle(range(shard_map.shard_count))
+http: Optional[aiohttp.ClientSession] = None
+
+_SESSION_PATH = re.compile(r"^api/interview/([^/]+)/")
+# Each worker registers its own shard in the Judge0 callback_url
+_CALLBACK_PATH = re.compile(r"^api/judge0/callback/(\d+)$")
+
+# Hop-by-hop headers, and ones aiohttp already applied when reading the body
+_DROPPED_HEADERS = {"host", "connection", "keep-alive", "transfer-encoding", "content-length", "content-encoding", "upgrade"}
+
+@app.on_event("startup")
+async def startup_event():
+    global http
+    if not shard_map.worker_urls:
+        raise RuntimeError("WORKER_URLS must list the worker base URLs, in shard order")
+    http = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=None, sock_connect=5))
+    print(f"✓ Routing sessions across {shard_map.shard_count} workers")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if http:
+        await http.close()
+
+@app.websocket("/ws/{session_id}")
+async def proxy_websocket(websocket: WebSocket, session_id: str):
+    """Relay a session's WebSocket to its owning worker"""
+    target = shard_map.url_for(session_id).replace("http", "ws", 1) + f"/ws/{session_id}"
+    if websocket.url.query:
+        target += f"?{websocket.url.query}"
+    
+    try:
+        # Offer the client's subprotocols upstream so the worker picks the wire format
+        async with http.ws_connect(target, protocols=websocket.scope.get("subprotocols", [])) as upstream:
+            await websocket.accept(subprotocol=upstream.protocol)
+            
+            async def client_to_worker():
+                while True:
+                    message = await websocket.receive()
+                    if message["type"] == "websocket.disconnect":
+                        return
+                    if message.get("text") is not None:
+                        await upstream.send_str(message["text"])
+                    elif message.get("bytes") is not None:
+                        await upstream.send_bytes(message["bytes"])
+            
+            async def worker_to_client():
+                async for message in upstream:
+                    if message.type == aiohttp.WSMsgType.TEXT:
+                        await websocket.send_text(message.data)
+                    elif message.type == aiohttp.WSMsgType.BINARY:
+                        await websocket.send_bytes(message.data)
+                    else:
+                        return
+            
+            tasks = [asyncio.create_task(client_to_worker()), asyncio.create_task(worker_to_client())]
+            done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in pending:
+                task.cancel()
+    except aiohttp.ClientError as e:
+        print(f"Worker unreachable for session {session_id}: {e}")
+    finally:
+        try:
+            await websocket.close()
+        except RuntimeError:
+            # Already closed by the client
+            pass
+
+async def fetch_from_worker(shard: int, path: str) -> dict:
+    try:
+        async with http.get(f"{shard_map.worker_urls[shard]}/{path}") as upstream:
+            if upstream.status != 200:
+                return {"shard": shard, "error": f"HTTP {upstream.status}"}
+            return {"shard": shard, **await upstream.json()}
+    except aiohttp.ClientError as e:
+        return {"shard": shard, "error": str(e)}
+
+async def gather_from_workers(path: str) -> dict:
+    """Collect a per-worker report from every worker, in shard order"""
+    reports = await asyncio.gather(*(fetch_from_worker(shard, path) for shard in range(shard_map.shard_count)))
+    return {"workers": list(reports)}
+
+# Stats describe a single worker, so the router reports every worker's rather than a random one
+
+@app.get("/api/judge0/stats")
+async def judge0_stats():
+    return await gather_from_workers("api/judge0/stats")
+
+@app.get("/api/sessions/stats")
+async def session_stats():
+    return await gather_from_workers("api/sessions/stats")
+
+@app.get("/api/vector_db/memory")
+async def vector_db_memory():
+    return await gather_from_workers("api/vector_db/memory")
+
+@app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"])
+async def proxy_http(path: str, request: Request):
+    """Forward session routes to the owning worker and everything else to any worker"""
+    match = _SESSION_PATH.match(path)
+    callback = _CALLBACK_PATH.match(path)
+    if match:
+        candidates = [shard_map.shard_of(match.group(1))]
+    elif callback and int(callback.group(1)) < shard_map.shard_count:
+        # Only the worker that submitted the run is waiting for its result
+        candidates = [int(callback.group(1))]
+    else:
+        # Stateless routes (and new sessions) may go anywhere; skip a worker that is down
+        first = next(next_worker)
+        candidates = [(first + offset) % shard_map.shard_count for offset in range(shard_map.shard_count)]
+    
+    headers = {k: v for k, v in request.headers.items() if k.lower() not in _DROPPED_HEADERS}
+    body = await request.body()
+    
+    for shard in candidates:
+        url = f"{shard_map.worker_urls[shard]}/{path}"
+        try:
+            async with http.request(request.method, url, params=request.query_params, headers=headers, data=body) as upstream:
+                content = await upstream.read()
+                response_headers = {k: v for k, v in upstream.headers.items() if k.lower() not in _DROPPED_HEADERS}
+                return Response(content=content, status_code=upstream.status, headers=response_headers)
+        except aiohttp.ClientConnectorError as e:
+            # Nothing reached the worker, so trying the next one is safe
+            print(f"Worker {shard} unreachable: {e}")
+        except aiohttp.ClientError as e:
+            return JSONResponse(status_code=502, content={"detail": f"Worker {shard} failed: {e}"})
+    
+    return JSONResponse(status_code=502, content={"detail": "No worker available"})
@@ -0,0 +1,362 @@
+import asyncio
+import os
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple, Callable
+from .quantization import QUANTIZATION_DTYPES, quantize, dequantize, quantized_scores
+
+class IVFFlatIndex:
+    """Cross-session approximate nearest-neighbour index (IVF-flat, NumPy only).
+    
+    Vectors are L2-normalized and bucketed under k-means centroids. A query
+    scans the nprobe closest buckets exactly. Until enough vectors exist to
+    train, queries fall back to a brute-force scan.
+    
+    With float16 or int8 quantization the index holds compact codes only; the
+    best top_k * rerank_factor candidates are re-scored exactly against
+    full-precision vectors fetched through vector_loader.
+    
+    remove_oldest() ages rows out, so the owner can keep the index under a
+    size cap or memory budget.
+    """
+    
+    FILTER_FIELDS = ("session_id", "role", "rubric_id", "agent")
+    
+    def __init__(self, dimension: int = 384, nlist: Optional[int] = None, nprobe: int = 8,
+                 train_threshold: int = 1024, retrain_growth: float = 4.0, kmeans_iterations: int = 10,
+                 quantization: str = "none", rerank_factor: int = 4,
+                 vector_loader: Optional[Callable[[List[str]], Tuple[np.ndarray, np.ndarray]]] = None):
+        self.dimension = dimension
+        self.nlist = nlist  # None sizes the index to ~sqrt(n) lists at training time
+        self.nprobe = nprobe
+        self.train_threshold = train_threshold
+        self.retrain_growth = retrain_growth
+        self.kmeans_iterations = kmeans_iterations
+        
+        if quantization not in QUANTIZATION_DTYPES:
+            raise ValueError(f"Unknown quantization: {quantization}")
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        # ids -> (full-precision rows, found mask); rows it cannot supply keep their quantized score
+        self.vector_loader = vector_loader
+        
+        self.count = 0
+        self.vectors = np.zeros((1024, dimension), dtype=QUANTIZATION_DTYPES[quantization])
+        self.scales = np.ones(1024, dtype=np.float32)
+        self.ids: List[str] = []
+        self.contents: List[str] = []
+        self.text_bytes = 0
+        
+        # Filterable metadata as integer codes, one array per field
+        self.codes = {field: np.zeros(1024, dtype=np.int32) for field in self.FILTER_FIELDS}
+        self.vocab: Dict[str, Dict[Any, int]] = {field: {} for field in self.FILTER_FIELDS}
+        self.values: Dict[str, List[Any]] = {field: [] for field in self.FILTER_FIELDS}
+        
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments = np.zeros(1024, dtype=np.int32)
+        self.lists: List[List[int]] = []
+        self._list_arrays: Dict[int, np.ndarray] = {}
+        self.trained_count = 0
+        self.training = False
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def add(self, vector_id: str, vector: np.ndarray, metadata: Dict[str, Any]) -> int:
+        """Insert one vector; it joins its nearest list immediately"""
+        if self.count == self.vectors.shape[0]:
+            self._grow()
+        
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        row = self.count
+        codes, scales = quantize(vector / norm if norm > 0 else vector, self.quantization)
+        self.vectors[row] = codes[0]
+        self.scales[row] = scales[0]
+        self.ids.append(vector_id)
+        self.contents.append(metadata.get("content") or "")
+        self.text_bytes += len(vector_id) + len(self.contents[-1])
+        for field in self.FILTER_FIELDS:
+            self.codes[field][row] = self._code(field, metadata.get(field))
+        
+        if self.centroids is not None:
+            cluster = int(np.argmax(self.centroids @ self._decoded(row, row + 1)[0]))
+            self.assignments[row] = cluster
+            self.lists[cluster].append(row)
+            self._list_arrays.pop(cluster, None)
+        
+        self.count += 1
+        return row
+    
+    def remove_oldest(self, n: int) -> int:
+        """Drop the n oldest rows; returns how many went (none while training runs)"""
+        n = min(n, self.count)
+        if n <= 0 or self.training:
+            return 0
+        keep = self.count - n
+        
+        self.vectors[:keep] = self.vectors[n:self.count]
+        self.scales[:keep] = self.scales[n:self.count]
+        self.assignments[:keep] = self.assignments[n:self.count]
+        self.text_bytes -= sum(len(i) + len(c) for i, c in zip(self.ids[:n], self.contents[:n]))
+        del self.ids[:n]
+        del self.contents[:n]
+        
+        # Renumber metadata codes so values no remaining row uses are forgotten
+        for field in self.FILTER_FIELDS:
+            used, remapped = np.unique(self.codes[field][n:self.count], return_inverse=True)
+            self.values[field] = [self.values[field][code] for code in used.tolist()]
+            self.vocab[field] = {value: code for code, value in enumerate(self.values[field])}
+            self.codes[field][:keep] = remapped
+        
+        self.count = keep
+        if self.vectors.shape[0] > 4 * max(keep, 1024):
+            self._resize(max(2 * keep, 1024))
+        if self.centroids is not None:
+            self._rebuild_lists()
+            self.trained_count = min(self.trained_count, keep)
+        return n
+    
+    def nbytes(self) -> int:
+        """Memory held by the index rows, including their id and content copies"""
+        count = self.count
+        arrays = self.vectors[:count].nbytes + self.scales[:count].nbytes + self.assignments[:count].nbytes
+        arrays += sum(codes[:count].nbytes for codes in self.codes.values())
+        centroids = self.centroids.nbytes if self.centroids is not None else 0
+        return arrays + centroids + self.text_bytes
+    
+    def needs_training(self) -> bool:
+        if self.training or self.count < self.train_threshold:
+            return False
+        return self.centroids is None or self.count >= self.trained_count * self.retrain_growth
+    
+    def train(self):
+        """Train synchronously, e.g. when building an index offline"""
+        count = self.count
+        centroids = self._kmeans(0, count)
+        assignments = self._assign(centroids, 0, count)
+        self._install(centroids, assignments, count)
+    
+    async def train_async(self):
+        """Train off the event loop on a snapshot, then swap the lists in"""
+        if self.training:
+            return
+        self.training = True
+        try:
+            count = self.count
+            # Rows below count are never rewritten, so reading them while add() grows the arrays is safe
+            centroids = await asyncio.to_thread(self._kmeans, 0, count)
+            assignments = await asyncio.to_thread(self._assign, centroids, 0, count)
+            self._install(centroids, assignments, count)
+        finally:
+            self.training = False
+    
+    def search(self, vector: np.ndarray, top_k: int = 5, filters: Optional[Dict[str, Any]] = None,
+               nprobe: Optional[int] = None, exclude_session_id: Optional[str] = None) -> List[Tuple[int, float]]:
+        """Rows and cosine similarities of the approximate top_k matches"""
+        if self.count == 0 or top_k <= 0:
+            return []
+        
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+        query = query / norm
+        
+        if self.centroids is None:
+            candidates = np.arange(self.count)
+        else:
+            probe = min(nprobe or self.nprobe, len(self.centroids))
+            centroid_scores = self.centroids @ query
+            closest = np.argpartition(-centroid_scores, probe - 1)[:probe]
+            candidates = np.concatenate([self._list_array(int(c)) for c in closest])
+        
+        mask = np.ones(len(candidates), dtype=bool)
+        for field, value in (filters or {}).items():
+            if field not in self.codes:
+                continue
+            code = self.vocab[field].get(value)
+            if code is None:
+                return []
+            mask &= self.codes[field][candidates] == code
+        if exclude_session_id is not None and exclude_session_id in self.vocab["session_id"]:
+            mask &= self.codes["session_id"][candidates] != self.vocab["session_id"][exclude_session_id]
+        candidates = candidates[mask]
+        if len(candidates) == 0:
+            return []
+        
+        scores = quantized_scores(self.vectors[candidates], self.scales[candidates], query, self.quantization)
+        if self.quantization != "none":
+            # Keep a wider shortlist from the codes, then re-rank it exactly
+            shortlist = self._top(scores, top_k * self.rerank_factor)
+            candidates, scores = candidates[shortlist], scores[shortlist]
+            scores = self._rerank(candidates, scores, query)
+        
+        best = self._top(scores, top_k)
+        return [(int(candidates[i]), float(scores[i])) for i in best]
+    
+    def _top(self, scores: np.ndarray, k: int) -> np.ndarray:
+        """Positions of the k highest scores, best first"""
+        k = min(k, len(scores))
+        best = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        return best[np.argsort(-scores[best], kind="stable")]
+    
+    def _rerank(self, candidates: np.ndarray, scores: np.ndarray, query: np.ndarray) -> np.ndarray:
+        if self.vector_loader is None:
+            return scores
+        vectors, found = self.vector_loader([self.ids[row] for row in candidates])
+        if not found.any():
+            return scores
+        exact = scores.copy()
+        exact[found] = vectors[found] @ query
+        return exact
+    
+    def record(self, row: int, similarity: float) -> Dict[str, Any]:
+        metadata = {
+            field: self._decode(field, int(self.codes[field][row]))
+            for field in self.FILTER_FIELDS
+        }
+        metadata["content"] = self.contents[row]
+        return {"id": self.ids[row], "similarity": similarity, "metadata": metadata}
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "vectors": self.count,
+            "trained": self.centroids is not None,
+            "lists": 0 if self.centroids is None else len(self.centroids),
+            "nprobe": self.nprobe,
+            "trained_count": self.trained_count,
+            "training": self.training,
+            "quantization": self.quantization,
+            "vector_bytes": self.vectors[:self.count].nbytes + (self.scales[:self.count].nbytes if self.quantization == "int8" else 0),
+            "bytes": self.nbytes()
+        }
+    
+    def save(self, path: str):
+        """Write the index in .npz format to exactly path (np.savez would append ".npz" to a bare name)"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            self._write(f)
+        os.replace(tmp_path, path)
+    
+    def _write(self, f):
+        np.savez(
+            f,
+            vectors=self.vectors[:self.count],
+            scales=self.scales[:self.count],
+            quantization=np.array(self.quantization),
+            ids=np.array(self.ids, dtype=object),
+            contents=np.array(self.contents, dtype=object),
+            centroids=self.centroids if self.centroids is not None else np.empty((0, self.dimension), dtype=np.float32),
+            assignments=self.assignments[:self.count],
+            **{f"codes_{field}": self.codes[field][:self.count] for field in self.FILTER_FIELDS},
+            vocab=np.array([self.vocab], dtype=object)
+        )
+    
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "IVFFlatIndex":
+        data = np.load(path, allow_pickle=True)
+        # Codes are stored as written; the saved quantization wins over the configured one
+        kwargs["quantization"] = str(data["quantization"]) if "quantization" in data else "none"
+        index = cls(dimension=data["vectors"].shape[1], **kwargs)
+        count = len(data["vectors"])
+        while index.vectors.shape[0] < count:
+            index._grow()
+        index.count = count
+        index.vectors[:count] = data["vectors"]
+        if "scales" in data:
+            index.scales[:count] = data["scales"]
+        index.ids = list(data["ids"])
+        index.contents = list(data["contents"])
+        index.text_bytes = sum(len(i) + len(c) for i, c in zip(index.ids, index.contents))
+        index.vocab = data["vocab"][0]
+        for field in cls.FILTER_FIELDS:
+            index.values[field] = sorted(index.vocab[field], key=index.vocab[field].get)
+        for field in cls.FILTER_FIELDS:
+            index.codes[field][:count] = data[f"codes_{field}"]
+        if len(data["centroids"]):
+            index._install(data["centroids"], data["assignments"], count)
+        return index
+    
+    def _grow(self):
+        self._resize(self.vectors.shape[0] * 2)
+    
+    def _resize(self, capacity: int):
+        vectors = np.zeros((capacity, self.dimension), dtype=self.vectors.dtype)
+        vectors[:self.count] = self.vectors[:self.count]
+        self.vectors = vectors
+        scales = np.ones(capacity, dtype=np.float32)
+        scales[:self.count] = self.scales[:self.count]
+        self.scales = scales
+        assignments = np.zeros(capacity, dtype=np.int32)
+        assignments[:self.count] = self.assignments[:self.count]
+        self.assignments = assignments
+        for field in self.FILTER_FIELDS:
+            codes = np.zeros(capacity, dtype=np.int32)
+            codes[:self.count] = self.codes[field][:self.count]
+            self.codes[field] = codes
+    
+    def _code(self, field: str, value: Any) -> int:
+        vocab = self.vocab[field]
+        if value not in vocab:
+            vocab[value] = len(vocab)
+            self.values[field].append(value)
+        return vocab[value]
+    
+    def _decode(self, field: str, code: int) -> Any:
+        values = self.values[field]
+        return values[code] if code < len(values) else None
+    
+    def _list_array(self, cluster: int) -> np.ndarray:
+        if cluster not in self._list_arrays:
+            self._list_arrays[cluster] = np.array(self.lists[cluster], dtype=np.int64)
+        return self._list_arrays[cluster]
+    
+    def _decoded(self, start: int, end: int) -> np.ndarray:
+        return dequantize(self.vectors[start:end], self.scales[start:end], self.quantization)
+    
+    def _kmeans(self, start: int, end: int) -> np.ndarray:
+        """Spherical k-means on a sample of rows [start, end)"""
+        count = end - start
+        nlist = self.nlist or max(1, int(np.sqrt(count)))
+        nlist = min(nlist, count)
+        rng = np.random.default_rng(0)
+        
+        sample_size = min(count, nlist * 64)
+        rows = start + np.sort(rng.choice(count, sample_size, replace=False))
+        sample = dequantize(self.vectors[rows], self.scales[rows], self.quantization)
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+        
+        for _ in range(self.kmeans_iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # Empty clusters keep their previous centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids)
+        
+        return centroids.astype(np.float32)
+    
+    def _assign(self, centroids: np.ndarray, start: int, end: int, chunk: int = 65536) -> np.ndarray:
+        labels = np.empty(end - start, dtype=np.int32)
+        for offset in range(start, end, chunk):
+            stop = min(offset + chunk, end)
+            labels[offset - start:stop - start] = np.argmax(self._decoded(offset, stop) @ centroids.T, axis=1)
+        return labels
+    
+    def _install(self, centroids: np.ndarray, assignments: np.ndarray, count: int):
+        """Swap in new centroids, assigning rows added while training ran"""
+        if self.count > count:
+            extra = self._assign(centroids, count, self.count)
+            assignments = np.concatenate([assignments, extra])
+        
+        self.assignments[:self.count] = assignments
+        self.centroids = centroids
+        self._rebuild_lists()
+        self.trained_count = self.count
+    
+    def _rebuild_lists(self):
+        lists: List[List[int]] = [[] for _ in range(len(self.centroids))]
+        for row, cluster in enumerate(self.assignments[:self.count].tolist()):
+            lists[cluster].append(row)
+        self.lists = lists
+        self._list_arrays = {}
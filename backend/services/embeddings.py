@@ -0,0 +1,170 @@
+import hashlib
+from abc import ABC, abstractmethod
+import re
+import threading
+import zlib
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+
+class BaseEmbedder(ABC):
+    """Turns text into fixed-size float32 vectors"""
+    
+    dimension: int = 384
+    
+    @abstractmethod
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        """One (len(texts), dimension) float32 matrix, one row per text"""
+    
+    def embed(self, text: str) -> np.ndarray:
+        return self.embed_many([text])[0]
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"embedder": type(self).__name__, "dimension": self.dimension}
+
+class HashingEmbedder(BaseEmbedder):
+    """Deterministic hashing-trick vectorizer over word unigrams and character n-grams.
+    
+    Features hash (CRC32, stable across processes) to a column and a sign, so
+    texts sharing words and word fragments end up with similar vectors.
+    """
+    
+    def __init__(self, dimension: int = 384, ngram_range: tuple = (3, 4), word_weight: float = 2.0, max_words: int = 200000):
+        self.dimension = dimension
+        self.ngram_range = ngram_range
+        self.word_weight = word_weight
+        self.max_words = max_words
+        # word -> (columns, signed weights) of the word and its n-grams
+        self._words: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+    
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        # Python only walks words; each distinct word's n-grams are hashed once and
+        # memoized, and everything per n-gram below is array arithmetic
+        vocabulary: Dict[str, int] = {}
+        word_ids: List[int] = []
+        word_counts: List[int] = []
+        for text in texts:
+            words = _WORD.findall((text or "").lower())
+            word_ids.extend(vocabulary.setdefault(word, len(vocabulary)) for word in words)
+            word_counts.append(len(words))
+        
+        matrix = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        if not vocabulary:
+            return matrix
+        
+        features = [self._word_features(word) for word in vocabulary]
+        lengths = np.array([len(columns) for columns, _ in features], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        columns = np.concatenate([columns for columns, _ in features])
+        weights = np.concatenate([weights for _, weights in features])
+        
+        # Count each (text, word) pair once, then expand the pairs into their features
+        rows = np.repeat(np.arange(len(texts), dtype=np.int64), word_counts)
+        pairs, counts = np.unique(rows * len(vocabulary) + np.asarray(word_ids, dtype=np.int64), return_counts=True)
+        pair_rows, pair_words = np.divmod(pairs, len(vocabulary))
+        pair_lengths = lengths[pair_words]
+        
+        ends = np.cumsum(pair_lengths)
+        index = np.arange(ends[-1]) + np.repeat(offsets[pair_words] - (ends - pair_lengths), pair_lengths)
+        
+        # Accumulate every feature of the batch in one pass
+        flat = np.bincount(
+            np.repeat(pair_rows, pair_lengths) * self.dimension + columns[index],
+            weights=weights[index] * np.repeat(counts, pair_lengths),
+            minlength=len(texts) * self.dimension
+        )
+        matrix[:] = flat.reshape(len(texts), self.dimension)
+        
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return matrix
+    
+    def _word_features(self, word: str) -> Tuple[np.ndarray, np.ndarray]:
+        cached = self._words.get(word)
+        if cached is not None:
+            return cached
+        
+        low, high = self.ngram_range
+        padded = f"<{word}>"
+        features = [word] + [padded[start:start + n] for n in range(low, high + 1) for start in range(len(padded) - n + 1)]
+        digests = np.array([zlib.crc32(feature.encode()) for feature in features], dtype=np.uint32)
+        
+        weights = np.where(digests & 0x80000000, 1.0, -1.0)
+        weights[0] *= self.word_weight
+        cached = ((digests % self.dimension).astype(np.int64), weights)
+        # Word vocabularies are small; bound the memo anyway
+        if len(self._words) < self.max_words:
+            self._words[word] = cached
+        return cached
+
+class CachedEmbedder(BaseEmbedder):
+    """LRU cache in front of another embedder, keyed by a hash of the text"""
+    
+    def __init__(self, embedder: BaseEmbedder, max_entries: int = 10000):
+        self.embedder = embedder
+        self.dimension = embedder.dimension
+        self.max_entries = max_entries
+        self.cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Batches may be embedded on a worker thread while queries embed on the event loop
+        self.lock = threading.Lock()
+    
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        keys = [hashlib.blake2b((text or "").encode(), digest_size=16).digest() for text in texts]
+        matrix = np.empty((len(texts), self.dimension), dtype=np.float32)
+        
+        missing: Dict[bytes, List[int]] = {}
+        with self.lock:
+            for row, key in enumerate(keys):
+                vector = self.cache.get(key)
+                if vector is None:
+                    missing.setdefault(key, []).append(row)
+                else:
+                    self.cache.move_to_end(key)
+                    matrix[row] = vector
+            
+            self.hits += len(texts) - sum(len(rows) for rows in missing.values())
+            self.misses += len(missing)
+        
+        if missing:
+            # Embed each distinct uncached text once, in a single batch
+            first_rows = [rows[0] for rows in missing.values()]
+            embedded = self.embedder.embed_many([texts[row] for row in first_rows])
+            with self.lock:
+                for (key, rows), vector in zip(missing.items(), embedded):
+                    matrix[rows] = vector
+                    self._store(key, vector)
+        
+        return matrix
+    
+    def _store(self, key: bytes, vector: np.ndarray):
+        if self.max_entries <= 0:
+            return
+        self.cache[key] = vector
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            **self.embedder.stats(),
+            "cache_entries": len(self.cache),
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+EMBEDDERS = {
+    "hashing": HashingEmbedder
+}
+
+def create_embedder(name: Optional[str] = None, dimension: int = 384, cache_size: int = 10000) -> BaseEmbedder:
+    """Build the named embedder (hashing by default) behind an LRU cache"""
+    embedder_class = EMBEDDERS.get(name or "hashing")
+    if embedder_class is None:
+        raise ValueError(f"Unknown embedder: {name}")
+    return CachedEmbedder(embedder_class(dimension), max_entries=cache_size)
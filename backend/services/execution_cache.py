@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+class ExecutionCache:
+    """Content-addressed cache for per-test-case execution results"""
+    
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, cache_dir: Optional[str] = None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        
+        # In-memory LRU tier: key -> (entry, size in bytes)
+        self.entries: "OrderedDict[str, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self.current_bytes = 0
+        
+        # Identical runs currently executing, shared by every caller that asks
+        self.inflight: Dict[str, asyncio.Future] = {}
+        
+        self.counters = {
+            "hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0
+        }
+        
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+    
+    def make_key(self, source_code: str, language_id: int, stdin: str, expected: str, time_limit: float, memory_limit: int,
+                 comparator: str = "exact") -> str:
+        """Hash everything that determines the outcome of a run"""
+        payload = json.dumps([source_code, language_id, stdin, expected, time_limit, memory_limit, comparator])
+        return hashlib.sha256(payload.encode()).hexdigest()
+    
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look a result up in memory, then on disk"""
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.counters["hits"] += 1
+            return self.entries[key][0]
+        
+        if self.cache_dir:
+            entry = await asyncio.to_thread(self._read_disk, key)
+            if entry is not None:
+                self.counters["disk_hits"] += 1
+                self._store_memory(key, entry)
+                return entry
+        
+        self.counters["misses"] += 1
+        return None
+    
+    async def put(self, key: str, entry: Dict[str, Any]):
+        """Store a result in every tier"""
+        self._store_memory(key, entry)
+        if self.cache_dir:
+            await asyncio.to_thread(self._write_disk, key, entry)
+    
+    def claim(self, key: str) -> Optional[asyncio.Future]:
+        """Return the in-flight future for key, or register the caller as its owner"""
+        if key in self.inflight:
+            self.counters["coalesced"] += 1
+            return self.inflight[key]
+        
+        self.inflight[key] = asyncio.get_running_loop().create_future()
+        return None
+    
+    def release(self, key: str, result: Optional[Dict[str, Any]] = None, error: Optional[BaseException] = None):
+        """Hand the owner's result to everyone waiting on key"""
+        waiter = self.inflight.pop(key, None)
+        if waiter is None or waiter.done():
+            return
+        
+        if isinstance(error, asyncio.CancelledError):
+            # The owner was cancelled; its waiters should see a failure, not a cancellation
+            error = RuntimeError("Shared execution was cancelled")
+        
+        if error is not None:
+            waiter.set_exception(error)
+            # Retrieve it so an unawaited future does not log a warning
+            waiter.exception()
+        else:
+            waiter.set_result(result)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory usage"""
+        lookups = self.counters["hits"] + self.counters["disk_hits"] + self.counters["misses"]
+        hit_rate = (self.counters["hits"] + self.counters["disk_hits"]) / lookups if lookups else 0
+        
+        return {
+            **self.counters,
+            "hit_rate": hit_rate,
+            "entries": len(self.entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "inflight": len(self.inflight),
+            "disk_enabled": bool(self.cache_dir)
+        }
+    
+    def _store_memory(self, key: str, entry: Dict[str, Any]):
+        size = len(json.dumps(entry))
+        if size > self.max_bytes:
+            return
+        
+        if key in self.entries:
+            self.current_bytes -= self.entries.pop(key)[1]
+        
+        self.entries[key] = (entry, size)
+        self.current_bytes += size
+        
+        while self.current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.counters["evictions"] += 1
+    
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+    
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._disk_path(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+    
+    def _write_disk(self, key: str, entry: Dict[str, Any]):
+        path = self._disk_path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error writing execution cache entry {key}: {e}")
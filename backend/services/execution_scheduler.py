@@ -0,0 +1,161 @@
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+
+class ExecutionRejected(Exception):
+    """Raised when the execution queue is full"""
+    
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+class ExecutionScheduler:
+    """Process-wide fair-share scheduler for code execution"""
+    
+    # Lower value is served first
+    PRIORITIES = {"submission": 0, "practice": 1}
+    
+    def __init__(self, max_slots: int = 32, max_queue_per_session: int = 4, max_queue_total: int = 256):
+        # A slot is one test case running in the sandbox
+        self.max_slots = max_slots
+        self.max_queue_per_session = max_queue_per_session
+        self.max_queue_total = max_queue_total
+        self.slots_in_use = 0
+        
+        # priority -> session_id -> queued jobs, in arrival order
+        self.queues: Dict[int, "OrderedDict[str, deque]"] = {level: OrderedDict() for level in self.PRIORITIES.values()}
+        self.queued = 0
+        
+        # Cost served per session; the least-served waiting session goes next
+        self.served: Dict[str, float] = {}
+        self.virtual_time = 0.0
+        
+        self.wait_times = deque(maxlen=1000)
+        self.counters = {"dispatched": 0, "completed": 0, "rejected": 0, "cancelled": 0}
+    
+    @asynccontextmanager
+    async def slot(self, session_id: Optional[str], priority: str = "practice", cost: int = 1):
+        """Wait for a fair share of the sandbox, then hold it for the block"""
+        job = self.enqueue(session_id or "anonymous", priority, cost)
+        try:
+            await job["future"]
+        except asyncio.CancelledError:
+            if job["future"].cancelled():
+                self.counters["cancelled"] += 1
+                self._remove(job)
+            else:
+                # Cancelled just after being dispatched
+                self.release(job)
+            raise
+        
+        try:
+            yield
+        finally:
+            self.release(job)
+    
+    def enqueue(self, session_id: str, priority: str, cost: int) -> Dict[str, Any]:
+        level = self.PRIORITIES.get(priority, self.PRIORITIES["practice"])
+        session_queue = self.queues[level].get(session_id)
+        session_depth = sum(len(q.get(session_id, ())) for q in self.queues.values())
+        
+        if self.queued >= self.max_queue_total or session_depth >= self.max_queue_per_session:
+            self.counters["rejected"] += 1
+            raise ExecutionRejected("Execution queue is full, please retry shortly", self.retry_after())
+        
+        if session_queue is None:
+            session_queue = self.queues[level][session_id] = deque()
+        
+        # A session that was idle rejoins at the current virtual time, not with banked credit
+        if session_depth == 0:
+            self.served[session_id] = max(self.served.get(session_id, 0.0), self.virtual_time)
+        
+        job = {
+            "session_id": session_id,
+            "level": level,
+            "cost": max(1, min(cost, self.max_slots)),
+            "enqueued_at": time.monotonic(),
+            "future": asyncio.get_running_loop().create_future()
+        }
+        session_queue.append(job)
+        self.queued += 1
+        self._dispatch()
+        return job
+    
+    def release(self, job: Dict[str, Any]):
+        if job.get("released"):
+            return
+        job["released"] = True
+        self.slots_in_use -= job["cost"]
+        self.counters["completed"] += 1
+        self._dispatch()
+    
+    def _remove(self, job: Dict[str, Any]):
+        session_queue = self.queues[job["level"]].get(job["session_id"])
+        if session_queue and job in session_queue:
+            session_queue.remove(job)
+            self.queued -= 1
+            if not session_queue:
+                del self.queues[job["level"]][job["session_id"]]
+        self._dispatch()
+    
+    def _dispatch(self):
+        """Start queued jobs while slots are free, highest priority and least-served session first"""
+        while self.queued:
+            job = self._next_job()
+            if job is None or job["cost"] > self.max_slots - self.slots_in_use:
+                # Head-of-line job waits for room so large runs are not starved
+                return
+            
+            session_queue = self.queues[job["level"]][job["session_id"]]
+            session_queue.popleft()
+            if not session_queue:
+                del self.queues[job["level"]][job["session_id"]]
+            self.queued -= 1
+            
+            self.slots_in_use += job["cost"]
+            self.served[job["session_id"]] += job["cost"]
+            self.virtual_time = max(self.virtual_time, self.served[job["session_id"]] - job["cost"])
+            self.wait_times.append(time.monotonic() - job["enqueued_at"])
+            self.counters["dispatched"] += 1
+            job["future"].set_result(None)
+    
+    def _next_job(self) -> Optional[Dict[str, Any]]:
+        for level in sorted(self.queues):
+            sessions = self.queues[level]
+            if sessions:
+                session_id = min(sessions, key=lambda s: self.served.get(s, 0.0))
+                return sessions[session_id][0]
+        return None
+    
+    def retry_after(self) -> float:
+        """Rough seconds until capacity frees up, from recent queue waits"""
+        if not self.wait_times:
+            return 1.0
+        return max(1.0, round(sum(self.wait_times) / len(self.wait_times), 1))
+    
+    def forget_session(self, session_id: str):
+        """Drop fairness state for a finished session"""
+        if not any(session_id in q for q in self.queues.values()):
+            self.served.pop(session_id, None)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, slot usage and wait time statistics"""
+        waits = sorted(self.wait_times)
+        depth = {
+            name: sum(len(q) for q in self.queues[level].values())
+            for name, level in self.PRIORITIES.items()
+        }
+        
+        return {
+            **self.counters,
+            "slots_in_use": self.slots_in_use,
+            "max_slots": self.max_slots,
+            "queued": self.queued,
+            "queue_depth": depth,
+            "active_sessions": len({s for q in self.queues.values() for s in q}),
+            "wait_avg": sum(waits) / len(waits) if waits else 0,
+            "wait_p95": waits[int(len(waits) * 0.95)] if waits else 0,
+            "wait_max": waits[-1] if waits else 0
+        }
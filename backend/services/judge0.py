@@ -2,13 +2,31 @@ import aiohttp
 import asyncio
 import base64
 import os
-from typing import Dict, Any, Optional
+import time
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+from .execution_cache import ExecutionCache
+from .local_executor import LocalExecutor
+from .execution_scheduler import ExecutionScheduler, ExecutionRejected
+from .judge0_endpoints import Judge0EndpointPool, Judge0Endpoint
+from .output_compare import get_comparator
 
 class Judge0Service:
     """Service for executing code using Judge0 API"""
     
     def __init__(self):
         self.api_url = os.getenv("JUDGE0_API_URL", "https://judge0-ce.p.rapidapi.com")
+        
+        # JUDGE0_API_URLS lists several instances; runs go to the fastest healthy
+        # one and are hedged onto a second when they outlast its latency percentile
+        api_urls = [u.strip() for u in (os.getenv("JUDGE0_API_URLS") or self.api_url).split(",") if u.strip()]
+        self.endpoints = Judge0EndpointPool(
+            api_urls,
+            failure_threshold=int(os.getenv("JUDGE0_BREAKER_FAILURES", "3")),
+            cooldown=float(os.getenv("JUDGE0_BREAKER_COOLDOWN", "30")),
+            hedge_percentile=float(os.getenv("JUDGE0_HEDGE_PERCENTILE", "95")),
+            hedge_min_delay=float(os.getenv("JUDGE0_HEDGE_MIN_DELAY", "1")),
+            hedge_default_delay=float(os.getenv("JUDGE0_HEDGE_DEFAULT_DELAY", "5"))
+        )
         self.api_key = os.getenv("JUDGE0_API_KEY")
         self.headers = {
             "X-RapidAPI-Key": self.api_key,
@@ -24,113 +42,677 @@ class Judge0Service:
             "javascript": 63,  # Node.js 12.14.0
             "c": 50        # C 11
         }
+        
+        # Test case submission: "batch" uses /submissions/batch, "concurrent"
+        # fans out single submissions under max_concurrency
+        self.submission_mode = os.getenv("JUDGE0_SUBMISSION_MODE", "batch")
+        self.max_concurrency = int(os.getenv("JUDGE0_MAX_CONCURRENCY", "10"))
+        self.batch_size = int(os.getenv("JUDGE0_BATCH_SIZE", "20"))  # Judge0 default batch cap
+        self.memory_limit = 256000  # 256 MB
+        
+        # Output checking: a test case may name its own "comparator"
+        # (exact, whitespace, token, float). Results carry stdout in "output"; with
+        # JUDGE0_FETCH_OUTPUT=false, runs whose cases are all exact skip downloading it
+        # (and "output" is empty) and take Judge0's verdict, which is the same exact rule.
+        self.default_comparator = os.getenv("OUTPUT_COMPARATOR", "exact")
+        self.fetch_output = os.getenv("JUDGE0_FETCH_OUTPUT", "true").lower() == "true"
+        
+        # Execution backend: "judge0" (HTTP API), "local" (sandboxed subprocesses)
+        # or "simulated" (random results, the default without an API key)
+        self.backend = os.getenv("EXECUTION_BACKEND") or ("judge0" if self.api_key else "simulated")
+        self.local_executor = LocalExecutor(
+            max_workers=int(os.getenv("LOCAL_EXECUTOR_WORKERS", str(os.cpu_count() or 2))),
+            memory_limit_kb=self.memory_limit,
+            max_output_bytes=int(os.getenv("LOCAL_EXECUTOR_MAX_OUTPUT_BYTES", str(1024 * 1024))),
+            max_processes=int(os.getenv("LOCAL_EXECUTOR_MAX_PROCESSES", "256")),
+            compile_memory_limit_kb=int(os.getenv("LOCAL_EXECUTOR_COMPILE_MEMORY_KB", str(1024 * 1024))),
+            artifact_dir=os.getenv("EXECUTION_ARTIFACT_DIR") or None,
+            default_comparator=self.default_comparator,
+            run_as_user=os.getenv("LOCAL_EXECUTOR_USER") or None
+        ) if self.backend == "local" else None
+        
+        # Fair-share admission for sandbox work across all sessions
+        self.scheduler = ExecutionScheduler(
+            max_slots=int(os.getenv("EXECUTION_MAX_CONCURRENT_CASES", "32")),
+            max_queue_per_session=int(os.getenv("EXECUTION_MAX_QUEUED_PER_SESSION", "4")),
+            max_queue_total=int(os.getenv("EXECUTION_MAX_QUEUED", "256"))
+        )
+        
+        # Content-addressed result cache in front of every run
+        self.cache = ExecutionCache(
+            max_bytes=int(os.getenv("EXECUTION_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+            cache_dir=os.getenv("EXECUTION_CACHE_DIR") or None
+        )
+        
+        # Pooled HTTP client, shared by every request for the life of the service
+        self.pool_limit = int(os.getenv("JUDGE0_POOL_LIMIT", "100"))
+        self.pool_limit_per_host = int(os.getenv("JUDGE0_POOL_LIMIT_PER_HOST", "30"))
+        self.dns_cache_ttl = int(os.getenv("JUDGE0_DNS_CACHE_TTL", "300"))
+        self.keepalive_timeout = float(os.getenv("JUDGE0_KEEPALIVE_TIMEOUT", "30"))
+        self.connect_timeout = float(os.getenv("JUDGE0_CONNECT_TIMEOUT", "5"))
+        self.request_timeout = float(os.getenv("JUDGE0_REQUEST_TIMEOUT", "30"))
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.waiting_connections = 0
+        self.active_requests = 0
+        self.connection_counters = {"opened": 0, "reused": 0}
+        
+        # Result delivery: Judge0 PUTs finished submissions to callback_url when
+        # configured; polling backs off from poll_initial_delay as a fallback
+        self.callback_url = os.getenv("JUDGE0_CALLBACK_URL")
+        self.callback_grace = float(os.getenv("JUDGE0_CALLBACK_GRACE", "3"))
+        self.poll_initial_delay = float(os.getenv("JUDGE0_POLL_INITIAL_DELAY", "0.1"))
+        self.poll_max_delay = float(os.getenv("JUDGE0_POLL_MAX_DELAY", "2"))
+        self.poll_backoff = float(os.getenv("JUDGE0_POLL_BACKOFF", "1.5"))
+        self.pending_callbacks: Dict[str, asyncio.Future] = {}
+        self.early_callbacks: Dict[str, Dict[str, Any]] = {}
+        self.max_early_callbacks = 1000
     
-    async def execute_code(self, source_code: str, language: str, test_cases: list, time_limit: int = 5) -> Dict[str, Any]:
-        """Execute code with test cases"""
+    async def start(self):
+        """Create the pooled HTTP client"""
+        if self.session and not self.session.closed:
+            return
         
-        if not self.api_key:
-            return self.simulate_execution(source_code, language, test_cases)
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_limit,
+            limit_per_host=self.pool_limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        
+        # Count requests in flight, requests queued behind the connection limit, and
+        # connections opened versus taken from the keep-alive pool
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_request_end.append(self._on_request_end)
+        trace_config.on_request_exception.append(self._on_request_end)
+        trace_config.on_connection_queued_start.append(self._on_queued_start)
+        trace_config.on_connection_queued_end.append(self._on_queued_end)
+        trace_config.on_connection_create_end.append(self._on_connection_opened)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reused)
+        
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.request_timeout, connect=self.connect_timeout),
+            trace_configs=[trace_config]
+        )
+    
+    async def close(self):
+        """Close the pooled HTTP client and local worker pool"""
+        if self.session and not self.session.closed:
+            await self.session.close()
+        self.session = None
+        if self.local_executor:
+            self.local_executor.close()
+    
+    async def get_session(self) -> aiohttp.ClientSession:
+        """Return the pooled client, creating it if the startup hook has not run"""
+        if not self.session or self.session.closed:
+            await self.start()
+        return self.session
+    
+    async def _on_request_start(self, session, context, params):
+        self.active_requests += 1
+    
+    async def _on_request_end(self, session, context, params):
+        self.active_requests -= 1
+    
+    async def _on_queued_start(self, session, context, params):
+        self.waiting_connections += 1
+    
+    async def _on_queued_end(self, session, context, params):
+        self.waiting_connections -= 1
+    
+    async def _on_connection_opened(self, session, context, params):
+        self.connection_counters["opened"] += 1
+    
+    async def _on_connection_reused(self, session, context, params):
+        self.connection_counters["reused"] += 1
+    
+    def pool_stats(self) -> Dict[str, Any]:
+        """Connection pool statistics from our own request tracing, and the configured limits.
+        
+        in_flight_requests counts requests, not connections. Idle connections are not
+        reported: aiohttp traces neither releases nor keep-alive closes, and its idle
+        pool is private. connections_reused against connections_opened shows how well
+        the pool is doing.
+        """
+        return {
+            "open": bool(self.session and not self.session.closed),
+            "in_flight_requests": self.active_requests,
+            "waiting": self.waiting_connections,
+            "connections_opened": self.connection_counters["opened"],
+            "connections_reused": self.connection_counters["reused"],
+            "limit": self.pool_limit,
+            "limit_per_host": self.pool_limit_per_host
+        }
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Runtime statistics for the execution service"""
+        stats = {
+            "backend": self.backend,
+            "pool": self.pool_stats(),
+            "cache": self.cache.stats(),
+            "scheduler": self.scheduler.stats(),
+            "endpoints": self.endpoints.stats()
+        }
+        if self.local_executor:
+            stats["local"] = self.local_executor.stats()
+        return stats
+    
+    async def execute_code(self, source_code: str, language: str, test_cases: list, time_limit: int = 5,
+                           on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+                           session_id: Optional[str] = None, priority: str = "practice") -> Dict[str, Any]:
+        """Execute code with test cases, calling on_result as each test case finishes.
+        
+        Sandbox work is admitted by the scheduler under session_id; priority is
+        "submission" for final submissions or "practice" for runs.
+        """
+        
+        if self.backend == "simulated":
+            execution = self.simulate_execution(source_code, language, test_cases)
+            if on_result:
+                for result in execution["results"]:
+                    await on_result(result)
+            return execution
         
         language_id = self.language_ids.get(language.lower())
         if not language_id:
             return {"error": f"Unsupported language: {language}"}
         
+        keys = [
+            self.cache.make_key(
+                source_code, language_id, test_case.get("input", ""), test_case.get("expected", ""),
+                time_limit, self.memory_limit, self.comparator_name(test_case)
+            )
+            for test_case in test_cases
+        ]
+        
+        results = [None] * len(test_cases)
+        
+        async def emit(i: int, entry: Dict[str, Any]):
+            results[i] = {"test_case": i + 1, **entry}
+            # Compile errors are reported once, in the final response
+            if on_result and entry.get("status") != "Compilation Error":
+                await on_result(results[i])
+        
+        # Look every case up first; claiming happens afterwards with no await in
+        # between, so a cancellation can never strand a claimed key
+        hits = {}
+        for i, key in enumerate(keys):
+            entry = await self.cache.get(key)
+            if entry is not None:
+                hits[i] = entry
+        
+        # Join identical runs already in flight and own the rest
+        shared = {}
+        owned = []
+        for i, key in enumerate(keys):
+            if i in hits:
+                continue
+            waiter = self.cache.claim(key)
+            if waiter is not None:
+                shared[i] = waiter
+            else:
+                owned.append(i)
+        
+        async def finish_owned(index: int, result: Dict[str, Any]):
+            i = owned[index]
+            if results[i] is not None:
+                return
+            entry = {k: v for k, v in result.items() if k != "test_case"}
+            self.cache.release(keys[i], entry)
+            if self.is_cacheable(entry):
+                await self.cache.put(keys[i], entry)
+            await emit(i, entry)
+        
+        async def run_owned():
+            async with self.scheduler.slot(session_id, priority, cost=len(owned)):
+                run_results = await self.run_test_cases(
+                    source_code, language.lower(), [test_cases[i] for i in owned], time_limit, finish_owned
+                )
+            for index, result in enumerate(run_results):
+                await finish_owned(index, result)
+        
+        async def wait_shared(i: int, waiter: asyncio.Future):
+            try:
+                entry = await asyncio.shield(waiter)
+            except Exception as e:
+                entry = {"status": "error", "error": str(e)}
+            await emit(i, entry)
+        
+        try:
+            for i, entry in hits.items():
+                await emit(i, entry)
+            await asyncio.gather(
+                *([run_owned()] if owned else []),
+                *(wait_shared(i, waiter) for i, waiter in shared.items())
+            )
+        except BaseException as e:
+            # Whatever stopped us (rejection, cancellation, a failed on_result), the
+            # callers sharing our claimed runs must not wait forever; released keys are skipped
+            for i in owned:
+                self.cache.release(keys[i], error=e)
+            if isinstance(e, ExecutionRejected):
+                return {"error": str(e), "retry_after": e.retry_after}
+            raise
+        
+        # A compile error belongs to the submission, not to any one test case
+        compile_error = next((r for r in results if r.get("status") == "Compilation Error"), None)
+        if compile_error:
+            summary = self.build_summary([], len(test_cases))
+            summary["overall_status"] = "compilation_error"
+            return {
+                "results": [],
+                "compile_error": compile_error.get("error", ""),
+                "summary": summary
+            }
+        
+        return {
+            "results": results,
+            "summary": self.build_summary(results, len(test_cases))
+        }
+    
+    def is_cacheable(self, entry: Dict[str, Any]) -> bool:
+        """Only deterministic verdicts are cached. Time limits depend on load, and
+        internal, exec-format, spawn and transport errors on the sandbox, so those are retried.
+        """
+        status = entry.get("status") or ""
+        return status in ("Accepted", "Wrong Answer", "Compilation Error") or status.startswith("Runtime Error")
+    
+    async def run_test_cases(self, source_code: str, language: str, test_cases: list, time_limit: int,
+                             on_result: Optional[Callable[[int, Dict[str, Any]], Awaitable[None]]] = None) -> List[Dict[str, Any]]:
+        """Run test cases on the configured backend and return one result per case"""
+        if self.backend == "local":
+            return await self.local_executor.run_test_cases(source_code, language, test_cases, time_limit, on_result)
+        return await self.run_judge0(source_code, self.language_ids[language], test_cases, time_limit, on_result)
+    
+    async def run_judge0(self, source_code: str, language_id: int, test_cases: list, time_limit: int,
+                         on_result: Optional[Callable[[int, Dict[str, Any]], Awaitable[None]]] = None) -> List[Dict[str, Any]]:
+        """Run test cases on Judge0, hedging onto a second endpoint when the first is slow"""
+        
+        primary = self.endpoints.choose()
+        if primary is None:
+            return [
+                {"test_case": i + 1, "status": "error", "error": "All Judge0 endpoints are unavailable"}
+                for i in range(len(test_cases))
+            ]
+        
+        attempts = {
+            asyncio.ensure_future(self.run_attempt(primary, source_code, language_id, test_cases, time_limit, on_result)): primary
+        }
+        
+        tried = [primary]
+        
+        hedge_delay = self.endpoints.hedge_delay(primary)
+        if hedge_delay is not None:
+            done, _ = await asyncio.wait(list(attempts), timeout=hedge_delay)
+            secondary = self.endpoints.choose(exclude=tried) if not done else None
+            if secondary is not None:
+                secondary.counters["hedges"] += 1
+                tried.append(secondary)
+                attempts[asyncio.ensure_future(
+                    self.run_attempt(secondary, source_code, language_id, test_cases, time_limit, on_result)
+                )] = secondary
+        
+        # First successful attempt wins; the other is cancelled. If every attempt
+        # failed outright, fail over to an endpoint not tried yet.
+        results = None
+        try:
+            while attempts:
+                done, _ = await asyncio.wait(list(attempts), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    attempts.pop(task)
+                    results = task.result()
+                    if self.attempt_succeeded(results):
+                        return results
+                
+                fallback = self.endpoints.choose(exclude=tried) if not attempts else None
+                if fallback is not None:
+                    tried.append(fallback)
+                    attempts[asyncio.ensure_future(
+                        self.run_attempt(fallback, source_code, language_id, test_cases, time_limit, on_result)
+                    )] = fallback
+        finally:
+            for task in attempts:
+                task.cancel()
+        
+        return results
+    
+    async def run_attempt(self, endpoint: Judge0Endpoint, source_code: str, language_id: int, test_cases: list, time_limit: int,
+                          on_result: Optional[Callable[[int, Dict[str, Any]], Awaitable[None]]] = None) -> List[Dict[str, Any]]:
+        """Run on one endpoint and feed the outcome to its latency history and circuit breaker"""
+        started = time.monotonic()
+        recorded = False
+        try:
+            results = await self.run_judge0_on(endpoint, source_code, language_id, test_cases, time_limit, on_result)
+        except asyncio.CancelledError:
+            # Lost a hedge: at least this slow, which steers routing away from it
+            endpoint.record_latency(time.monotonic() - started)
+            raise
+        except Exception as e:
+            endpoint.record_failure()
+            recorded = True
+            return [{"test_case": i + 1, "status": "error", "error": str(e)} for i in range(len(test_cases))]
+        finally:
+            if not recorded:
+                # A cancelled hedge loser must not hold the half-open trial slot
+                endpoint.trial_in_flight = False
+        
+        if self.attempt_succeeded(results):
+            endpoint.record_success(time.monotonic() - started)
+        else:
+            endpoint.record_failure()
+        return results
+    
+    def attempt_succeeded(self, results: List[Dict[str, Any]]) -> bool:
+        """An attempt fails when no test case got a verdict from Judge0"""
+        return not results or any(r.get("status") not in ("error", "Timeout") for r in results)
+    
+    async def run_judge0_on(self, endpoint: Judge0Endpoint, source_code: str, language_id: int, test_cases: list, time_limit: int,
+                            on_result: Optional[Callable[[int, Dict[str, Any]], Awaitable[None]]] = None) -> List[Dict[str, Any]]:
+        """Run test cases on one Judge0 endpoint and return one result per case"""
+        
+        # Encode the source once and share it across every test case
+        encoded_source = self.encode(source_code)
+        submissions = [
+            self.build_submission(encoded_source, language_id, test_case, time_limit)
+            for test_case in test_cases
+        ]
+        
+        session = await self.get_session()
+        if self.submission_mode == "batch":
+            submitted = await self.submit_batch(session, submissions, endpoint.url)
+        else:
+            submitted = await self.submit_concurrent(session, submissions, endpoint.url)
+        
+        # Poll every pending token together
+        tokens = [s["token"] for s in submitted if s.get("token")]
+        token_index = {s["token"]: i for i, s in enumerate(submitted) if s.get("token")}
+        
+        async def on_finished(token: str, result: Dict[str, Any]):
+            if on_result:
+                i = token_index[token]
+                await on_result(i, self.format_result(i, test_cases[i], result))
+        
+        fields = self.result_fields([self.comparator_name(test_case) for test_case in test_cases])
+        finished = await self.get_batch_results(session, tokens, on_finished=on_finished, api_url=endpoint.url, fields=fields)
+        
         results = []
+        for i, (test_case, submission) in enumerate(zip(test_cases, submitted)):
+            if "error" in submission:
+                results.append({
+                    "test_case": i + 1,
+                    "status": "error",
+                    "error": submission["error"]
+                })
+                continue
+            
+            result = finished.get(submission["token"], self.timeout_result())
+            results.append(self.format_result(i, test_case, result))
         
-        async with aiohttp.ClientSession() as session:
-            for i, test_case in enumerate(test_cases):
-                try:
-                    # Prepare submission
-                    submission_data = {
-                        "source_code": base64.b64encode(source_code.encode()).decode(),
-                        "language_id": language_id,
-                        "stdin": base64.b64encode(test_case.get("input", "").encode()).decode(),
-                        "expected_output": base64.b64encode(test_case.get("expected", "").encode()).decode(),
-                        "cpu_time_limit": time_limit,
-                        "memory_limit": 256000  # 256 MB
-                    }
+        return results
+    
+    def encode(self, text: str) -> str:
+        """Base64-encode text for Judge0"""
+        return base64.b64encode(text.encode()).decode()
+    
+    def decode(self, text: Optional[str]) -> str:
+        """Decode a base64 field returned by Judge0"""
+        if not text:
+            return ""
+        try:
+            return base64.b64decode(text).decode(errors="replace")
+        except Exception:
+            return text
+    
+    def build_submission(self, encoded_source: str, language_id: int, test_case: Dict[str, Any], time_limit: int) -> Dict[str, Any]:
+        """Build the submission payload for a single test case"""
+        submission = {
+            "source_code": encoded_source,
+            "language_id": language_id,
+            "stdin": self.encode(test_case.get("input", "")),
+            "expected_output": self.encode(test_case.get("expected", "")),
+            "cpu_time_limit": time_limit,
+            "memory_limit": self.memory_limit
+        }
+        if self.callback_url:
+            submission["callback_url"] = self.callback_url
+        return submission
+    
+    async def submit_batch(self, session: aiohttp.ClientSession, submissions: List[Dict[str, Any]], api_url: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Submit test cases through /submissions/batch, one chunk at a time"""
+        
+        submitted = []
+        for start in range(0, len(submissions), self.batch_size):
+            chunk = submissions[start:start + self.batch_size]
+            try:
+                async with session.post(
+                    f"{api_url or self.api_url}/submissions/batch",
+                    params={"base64_encoded": "true"},
+                    json={"submissions": chunk},
+                    headers=self.headers
+                ) as response:
+                    if response.status != 201:
+                        submitted.extend({"error": f"Submission failed: {response.status}"} for _ in chunk)
+                        continue
                     
-                    # Submit code
+                    for entry in await response.json():
+                        if entry.get("token"):
+                            submitted.append({"token": entry["token"]})
+                        else:
+                            submitted.append({"error": f"Submission rejected: {entry}"})
+                    
+            except Exception as e:
+                submitted.extend({"error": str(e)} for _ in chunk)
+        
+        return submitted
+    
+    async def submit_concurrent(self, session: aiohttp.ClientSession, submissions: List[Dict[str, Any]], api_url: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Submit test cases individually, fanned out under the concurrency limit"""
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def submit(submission: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                try:
                     async with session.post(
-                        f"{self.api_url}/submissions",
-                        json=submission_data,
+                        f"{api_url or self.api_url}/submissions",
+                        params={"base64_encoded": "true"},
+                        json=submission,
                         headers=self.headers
                     ) as response:
                         if response.status != 201:
-                            results.append({
-                                "test_case": i + 1,
-                                "status": "error",
-                                "error": f"Submission failed: {response.status}"
-                            })
-                            continue
+                            return {"error": f"Submission failed: {response.status}"}
+                        
+                        data = await response.json()
+                        return {"token": data["token"]}
                         
-                        submission = await response.json()
-                        token = submission["token"]
-                    
-                    # Wait for execution and get result
-                    result = await self.get_submission_result(session, token)
-                    results.append({
-                        "test_case": i + 1,
-                        "status": result.get("status", {}).get("description", "Unknown"),
-                        "passed": result.get("stdout", "").strip() == test_case.get("expected", "").strip(),
-                        "output": result.get("stdout", ""),
-                        "error": result.get("stderr", ""),
-                        "time": result.get("time", 0),
-                        "memory": result.get("memory", 0)
-                    })
-                    
                 except Exception as e:
-                    results.append({
-                        "test_case": i + 1,
-                        "status": "error",
-                        "error": str(e)
-                    })
+                    return {"error": str(e)}
+        
+        return await asyncio.gather(*(submit(s) for s in submissions))
+    
+    async def get_batch_results(self, session: aiohttp.ClientSession, tokens: List[str], max_wait: float = 30,
+                                on_finished: Optional[Callable[[str, Dict[str, Any]], Awaitable[None]]] = None,
+                                api_url: Optional[str] = None, fields: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Wait for a set of tokens, via Judge0 callbacks when enabled and polling otherwise"""
+        
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max_wait
+        finished = {}
+        
+        # Register a future per token; callbacks that raced ahead resolve immediately
+        waiters = {}
+        for token in tokens:
+            waiter = loop.create_future()
+            if token in self.early_callbacks:
+                waiter.set_result(self.early_callbacks.pop(token))
+            self.pending_callbacks[token] = waiter
+            waiters[token] = waiter
+        
+        # With callbacks on, polling is only a fallback, so give them a head start
+        delay = self.callback_grace if self.callback_url else self.poll_initial_delay
+        
+        reported = set()
+        next_poll = loop.time() + delay
+        
+        try:
+            while True:
+                for token in tokens:
+                    if token not in finished and waiters[token].done():
+                        finished[token] = waiters[token].result()
+                
+                if on_finished:
+                    for token in [t for t in finished if t not in reported]:
+                        reported.add(token)
+                        await on_finished(token, finished[token])
+                
+                pending = [t for t in tokens if t not in finished]
+                now = loop.time()
+                if not pending or now >= deadline:
+                    break
+                
+                await asyncio.wait(
+                    [waiters[t] for t in pending],
+                    timeout=max(min(next_poll, deadline) - now, 0),
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                if loop.time() >= next_poll:
+                    pending = [t for t in pending if not waiters[t].done()]
+                    if pending:
+                        finished.update(await self.poll_submissions(session, pending, api_url, fields))
+                    delay = min(delay * self.poll_backoff, self.poll_max_delay)
+                    next_poll = loop.time() + delay
+                
+        finally:
+            for token in tokens:
+                self.pending_callbacks.pop(token, None)
+        
+        return finished
+    
+    async def poll_submissions(self, session: aiohttp.ClientSession, tokens: List[str], api_url: Optional[str] = None,
+                               fields: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """Poll Judge0 once for a set of tokens and return the finished ones.
+        
+        Pending tokens are polled for their status only; result fields are
+        downloaded once, for the tokens that have finished.
+        """
+        
+        finished = {}
+        try:
+            for start in range(0, len(tokens), self.batch_size):
+                chunk = tokens[start:start + self.batch_size]
+                statuses = await self.fetch_batch(session, chunk, "token,status", api_url)
+                done = [token for token, result in zip(chunk, statuses) if self.is_finished(result)]
+                if not done:
+                    continue
+                
+                results = await self.fetch_batch(session, done, fields or self.result_fields([]), api_url)
+                for token, result in zip(done, results):
+                    if self.is_finished(result):
+                        finished[token] = result
+                    
+        except Exception as e:
+            print(f"Error polling submissions {tokens}: {e}")
+        
+        return finished
+    
+    async def fetch_batch(self, session: aiohttp.ClientSession, tokens: List[str], fields: str, api_url: Optional[str] = None) -> List[Dict[str, Any]]:
+        """GET /submissions/batch for up to batch_size tokens, limited to fields"""
+        async with session.get(
+            f"{api_url or self.api_url}/submissions/batch",
+            params={"tokens": ",".join(tokens), "base64_encoded": "true", "fields": fields},
+            headers=self.headers
+        ) as response:
+            if response.status != 200:
+                return []
+            
+            data = await response.json()
+            return data.get("submissions", [])
+    
+    def is_finished(self, result: Optional[Dict[str, Any]]) -> bool:
+        """Check if execution is complete"""
+        status_id = (result or {}).get("status", {}).get("id")
+        return status_id not in [None, 1, 2]  # Not "In Queue" or "Processing"
+    
+    def handle_callback(self, result: Dict[str, Any]) -> bool:
+        """Resolve the waiter for a submission delivered by Judge0's callback_url"""
+        token = result.get("token")
+        if not token or not self.is_finished(result):
+            return False
+        
+        waiter = self.pending_callbacks.get(token)
+        if waiter is None:
+            # Callback arrived before the submitter registered; hold it briefly
+            self.early_callbacks[token] = result
+            while len(self.early_callbacks) > self.max_early_callbacks:
+                self.early_callbacks.pop(next(iter(self.early_callbacks)))
+            return True
+        
+        if not waiter.done():
+            waiter.set_result(result)
+        return True
+    
+    def comparator_name(self, test_case: Dict[str, Any]) -> str:
+        return test_case.get("comparator") or self.default_comparator
+    
+    def result_fields(self, comparators: List[str]) -> str:
+        """Fields to download once a submission has finished"""
+        fields = ["token", "status", "stderr", "compile_output", "time", "memory"]
+        if self.fetch_output or any(c != "exact" for c in comparators):
+            fields.append("stdout")
+        return ",".join(fields)
+    
+    def format_result(self, index: int, test_case: Dict[str, Any], result: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert a Judge0 submission into a test case result"""
+        stdout = self.decode(result.get("stdout"))
+        comparator = self.comparator_name(test_case)
+        status_id = result.get("status", {}).get("id")
+        
+        if comparator == "exact" and "stdout" not in result:
+            # Judge0 already compared stdout with expected_output by the same rule
+            passed = status_id == 3
+        else:
+            # Only a run that finished cleanly (Accepted or Wrong Answer) is judged on its output
+            passed = status_id in (3, 4) and get_comparator(comparator)(stdout, test_case.get("expected", ""))
         
-        # Calculate summary
+        return {
+            "test_case": index + 1,
+            "status": result.get("status", {}).get("description", "Unknown"),
+            "passed": passed,
+            "output": stdout,
+            "error": self.decode(result.get("stderr")) or self.decode(result.get("compile_output")) or result.get("error", ""),
+            "time": float(result.get("time") or 0),
+            "memory": result.get("memory") or 0
+        }
+    
+    def build_summary(self, results: List[Dict[str, Any]], total_tests: int) -> Dict[str, Any]:
+        """Calculate the summary block for a set of test case results"""
         passed_tests = sum(1 for r in results if r.get("passed", False))
-        total_tests = len(test_cases)
         pass_rate = (passed_tests / total_tests) * 100 if total_tests > 0 else 0
         
         avg_time = sum(r.get("time", 0) for r in results) / len(results) if results else 0
         max_memory = max(r.get("memory", 0) for r in results) if results else 0
         
         return {
-            "results": results,
-            "summary": {
-                "passed": passed_tests,
-                "total": total_tests,
-                "pass_rate": pass_rate,
-                "avg_execution_time": avg_time,
-                "max_memory_usage": max_memory,
-                "overall_status": "passed" if passed_tests == total_tests else "failed"
-            }
+            "passed": passed_tests,
+            "total": total_tests,
+            "pass_rate": pass_rate,
+            "avg_execution_time": avg_time,
+            "max_memory_usage": max_memory,
+            "overall_status": "passed" if passed_tests == total_tests else "failed"
         }
     
-    async def get_submission_result(self, session: aiohttp.ClientSession, token: str, max_wait: int = 30) -> Dict[str, Any]:
-        """Get submission result with polling"""
-        
-        for _ in range(max_wait):
-            try:
-                async with session.get(
-                    f"{self.api_url}/submissions/{token}",
-                    headers=self.headers
-                ) as response:
-                    if response.status == 200:
-                        result = await response.json()
-                        
-                        # Check if execution is complete
-                        status_id = result.get("status", {}).get("id")
-                        if status_id not in [1, 2]:  # Not "In Queue" or "Processing"
-                            return result
-                
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                print(f"Error polling submission {token}: {e}")
-                break
-        
+    def timeout_result(self) -> Dict[str, Any]:
+        """Result used when a submission never finishes"""
         return {"status": {"description": "Timeout"}, "error": "Execution timeout"}
     
+    async def get_submission_result(self, session: aiohttp.ClientSession, token: str, max_wait: float = 30, api_url: Optional[str] = None) -> Dict[str, Any]:
+        """Get submission result via callback or adaptive polling"""
+        results = await self.get_batch_results(session, [token], max_wait, api_url=api_url)
+        return results.get(token, self.timeout_result())
+    
     def simulate_execution(self, source_code: str, language: str, test_cases: list) -> Dict[str, Any]:
         """Simulate code execution when Judge0 API is not available"""
         
@@ -174,16 +756,24 @@ class Judge0Service:
     
     async def health_check(self) -> bool:
         """Check if Judge0 service is available"""
+        if self.backend == "local":
+            return True
         if not self.api_key:
             return False
         
-        try:
-            async with aiohttp.ClientSession() as session:
+        session = await self.get_session()
+        
+        async def check(url: str) -> bool:
+            try:
                 async with session.get(
-                    f"{self.api_url}/system_info",
+                    f"{url}/system_info",
                     headers=self.headers,
                     timeout=aiohttp.ClientTimeout(total=5)
                 ) as response:
                     return response.status == 200
-        except:
-            return False
+            except:
+                return False
+        
+        # Healthy while at least one endpoint answers
+        checks = await asyncio.gather(*(check(e.url) for e in self.endpoints.endpoints))
+        return any(checks)
@@ -0,0 +1,109 @@
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+class Judge0Endpoint:
+    """One Judge0 instance with a latency history and a circuit breaker"""
+    
+    def __init__(self, url: str, failure_threshold: int = 3, cooldown: float = 30):
+        self.url = url.rstrip("/")
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        
+        self.latencies = deque(maxlen=200)
+        self.ewma: Optional[float] = None
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.counters = {"requests": 0, "failures": 0, "hedges": 0}
+    
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return "open"
+        return "half_open"
+    
+    def available(self) -> bool:
+        state = self.state
+        # Half-open admits a single trial request
+        return state == "closed" or (state == "half_open" and not self.trial_in_flight)
+    
+    def record_latency(self, latency: float):
+        self.latencies.append(latency)
+        self.ewma = latency if self.ewma is None else 0.8 * self.ewma + 0.2 * latency
+    
+    def record_success(self, latency: float):
+        self.record_latency(latency)
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+    
+    def record_failure(self):
+        self.counters["failures"] += 1
+        self.consecutive_failures += 1
+        self.trial_in_flight = False
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+    
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ewma": self.ewma,
+            "latency_p50": self.percentile(50),
+            "latency_p95": self.percentile(95),
+            **self.counters
+        }
+
+class Judge0EndpointPool:
+    """Routes runs across Judge0 endpoints by health and measured latency"""
+    
+    def __init__(self, urls: List[str], failure_threshold: int = 3, cooldown: float = 30,
+                 hedge_percentile: float = 95, hedge_min_delay: float = 1.0, hedge_default_delay: float = 5.0, min_samples: int = 20):
+        self.endpoints = [Judge0Endpoint(url, failure_threshold, cooldown) for url in urls]
+        self.hedge_percentile = hedge_percentile
+        self.hedge_min_delay = hedge_min_delay
+        self.hedge_default_delay = hedge_default_delay
+        self.min_samples = min_samples
+    
+    def choose(self, exclude: Optional[List[Judge0Endpoint]] = None) -> Optional[Judge0Endpoint]:
+        """Pick the healthy endpoint with the lowest expected latency"""
+        candidates = [e for e in self.endpoints if e.available() and e not in (exclude or [])]
+        if not candidates:
+            return None
+        
+        # Endpoints without samples are ranked at the pool's mean latency rather than
+        # as free, and each consecutive failure inflates an endpoint's score, so one
+        # that fails before ever recording a latency is not picked again and again
+        sampled = [e.ewma for e in self.endpoints if e.ewma is not None]
+        prior = sum(sampled) / len(sampled) if sampled else self.hedge_default_delay
+        
+        def score(e: Judge0Endpoint):
+            latency = e.ewma if e.ewma is not None else prior
+            return (e.state != "closed", latency * (1 + e.consecutive_failures))
+        
+        endpoint = min(candidates, key=score)
+        if endpoint.state == "half_open":
+            endpoint.trial_in_flight = True
+        endpoint.counters["requests"] += 1
+        return endpoint
+    
+    def hedge_delay(self, endpoint: Judge0Endpoint) -> Optional[float]:
+        """How long to wait on endpoint before sending a duplicate elsewhere"""
+        if len(self.endpoints) < 2:
+            return None
+        if len(endpoint.latencies) < self.min_samples:
+            return self.hedge_default_delay
+        return max(self.hedge_min_delay, endpoint.percentile(self.hedge_percentile))
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        return [endpoint.stats() for endpoint in self.endpoints]
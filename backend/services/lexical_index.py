@@ -0,0 +1,83 @@
+import re
+import numpy as np
+from collections import Counter
+from typing import List, Dict, Tuple
+
+_TOKEN = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall((text or "").lower())
+
+class InvertedIndex:
+    """BM25 inverted index over a growing list of documents, addressed by row"""
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.count = 0
+        self.total_length = 0
+        self.posting_count = 0
+        self.doc_lengths = np.zeros(16, dtype=np.float64)
+        
+        # term -> rows containing it (ascending) and the term frequency in each
+        self.postings: Dict[str, Tuple[List[int], List[int]]] = {}
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def add(self, text: str) -> int:
+        """Index the next document; returns its row"""
+        row = self.count
+        tokens = tokenize(text)
+        for term, frequency in Counter(tokens).items():
+            rows, frequencies = self.postings.setdefault(term, ([], []))
+            rows.append(row)
+            frequencies.append(frequency)
+        self.posting_count += len(set(tokens))
+        
+        if row == len(self.doc_lengths):
+            self.doc_lengths = np.concatenate([self.doc_lengths, np.zeros(row, dtype=np.float64)])
+        self.doc_lengths[row] = len(tokens)
+        self.total_length += len(tokens)
+        self.count += 1
+        return row
+    
+    def nbytes(self) -> int:
+        """Approximate memory held by the postings and document lengths"""
+        return self.doc_lengths.nbytes + 72 * self.posting_count + 120 * len(self.postings)
+    
+    def sync(self, contents: List[str]):
+        """Index documents appended to contents since the last call"""
+        for text in contents[self.count:]:
+            self.add(text)
+    
+    def scores(self, query: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Rows matching any query term and their BM25 scores, touching only those rows' postings"""
+        terms = [term for term in set(tokenize(query)) if term in self.postings]
+        if not terms:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        
+        average_length = self.total_length / self.count if self.count else 1.0
+        
+        all_rows, all_scores = [], []
+        for term in terms:
+            rows, frequencies = self.postings[term]
+            rows = np.asarray(rows, dtype=np.int64)
+            frequencies = np.asarray(frequencies, dtype=np.float64)
+            idf = np.log(1 + (self.count - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[rows] / max(average_length, 1e-9))
+            all_rows.append(rows)
+            all_scores.append(idf * frequencies * (self.k1 + 1) / (frequencies + norm))
+        
+        matched, inverse = np.unique(np.concatenate(all_rows), return_inverse=True)
+        return matched, np.bincount(inverse, weights=np.concatenate(all_scores))
+    
+    def search(self, query: str, top_k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """Top rows by BM25, best first"""
+        rows, scores = self.scores(query)
+        if len(rows) == 0 or top_k <= 0:
+            return rows, scores
+        k = min(top_k, len(rows))
+        best = np.argpartition(-scores, k - 1)[:k] if k < len(rows) else np.arange(len(rows))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        return rows[best], scores[best]
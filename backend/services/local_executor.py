@@ -0,0 +1,448 @@
+import asyncio
+import hashlib
+import os
+import pwd
+import shutil
+import signal
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable, Awaitable, Tuple
+from .output_compare import get_comparator
+
+# Sets the rlimits, drops to the sandbox user when one is given (uid/gid -1
+# otherwise), then execs the submission. Limits are applied in this wrapper
+# rather than with preexec_fn, which is unsafe to use from the worker threads
+# that spawn children. Failures are marked so they are not blamed on the program.
+_SANDBOX_ERROR = "sandbox setup failed: "
+_LIMIT_WRAPPER = """
+import os, resource, sys
+# execvp imports this lazily; load it while the interpreter's own files are still readable
+import warnings
+cpu, fsize, address_space, nproc, uid, gid = (int(v) for v in sys.argv[1:7])
+try:
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu + 1))
+    resource.setrlimit(resource.RLIMIT_FSIZE, (fsize, fsize))
+    resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+    resource.setrlimit(resource.RLIMIT_NPROC, (nproc, nproc))
+    if address_space:
+        resource.setrlimit(resource.RLIMIT_AS, (address_space, address_space))
+    if uid >= 0:
+        os.setgroups([])
+        os.setgid(gid)
+        os.setuid(uid)
+    os.umask(0o022)
+    os.execvp(sys.argv[7], sys.argv[7:])
+except Exception as e:
+    sys.stderr.write(f"%s{sys.argv[7]}: {e}\\n")
+    os._exit(127)
+""" % _SANDBOX_ERROR
+
+class SandboxError(RuntimeError):
+    """The sandbox could not start a process; says nothing about the submission"""
+
+class LocalExecutor:
+    """Runs submissions as local subprocesses under rlimit-based caps.
+    
+    The rlimits bound resources, not access: unless run_as_user names a
+    dedicated unprivileged account (the server must then run as root), a
+    submission runs as the server's user and can read every file it can,
+    including the repository and .env. Use Judge0 where that matters.
+    """
+    
+    def __init__(self, max_workers: int = 4, memory_limit_kb: int = 256000, max_output_bytes: int = 1024 * 1024, compile_timeout: int = 30,
+                 artifact_dir: Optional[str] = None, max_artifacts: int = 128, default_comparator: str = "exact",
+                 max_processes: int = 256, compile_memory_limit_kb: int = 1024 * 1024, max_artifact_bytes: int = 64 * 1024 * 1024,
+                 run_as_user: Optional[str] = None):
+        self.memory_limit_kb = memory_limit_kb
+        # Compilers run under their own, larger caps: hostile source can blow up compile time and memory
+        self.compile_memory_limit_kb = compile_memory_limit_kb
+        self.max_artifact_bytes = max_artifact_bytes
+        # RLIMIT_NPROC counts every process of the user, so run the backend as a
+        # dedicated user for this to bound a fork bomb (root is exempt)
+        self.max_processes = max_processes
+        self.default_comparator = default_comparator
+        self.max_output_bytes = max_output_bytes
+        self.compile_timeout = compile_timeout
+        
+        # (uid, gid) submissions and compilers run as; None runs them as this process's user
+        self.run_as = self._resolve_user(run_as_user) if run_as_user else None
+        if self.run_as is None:
+            print("⚠ Local executor runs submissions as the server user; they can read its files (set LOCAL_EXECUTOR_USER)")
+        
+        # Compiled programs keyed by source hash, reused across runs and test cases. Only
+        # this user may write the directory, since anything in it is trusted and executed;
+        # the sandbox user may traverse it to run artifacts.
+        self.artifact_dir = artifact_dir or os.path.join(tempfile.gettempdir(), f"interview-artifacts-{os.getuid()}")
+        self.max_artifacts = max_artifacts
+        self.artifacts: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.compiling: Dict[str, asyncio.Future] = {}
+        self.counters = {"compiles": 0, "artifact_hits": 0, "compile_errors": 0}
+        self._make_private_dir(self.artifact_dir)
+        
+        # Each worker thread supervises one child, so this bounds live processes
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="local-executor")
+        
+        # Per-language source file, compile step and run command ({dir} is the
+        # artifact directory). Runtimes that reserve large virtual address spaces
+        # (JVM, V8) get a heap flag instead of RLIMIT_AS.
+        self.languages = {
+            "python": {
+                "source": "main.py",
+                "compile": None,
+                "run": [sys.executable, "{dir}/main.py"],
+                "limit_address_space": True
+            },
+            "javascript": {
+                "source": "main.js",
+                "compile": None,
+                "run": ["node", f"--max-old-space-size={memory_limit_kb // 1024}", "{dir}/main.js"],
+                "limit_address_space": False
+            },
+            "c": {
+                "source": "main.c",
+                "compile": ["gcc", "-O2", "-std=c11", "-o", "main", "main.c", "-lm"],
+                "run": ["{dir}/main"],
+                "limit_address_space": True
+            },
+            "cpp": {
+                "source": "main.cpp",
+                "compile": ["g++", "-O2", "-std=c++17", "-o", "main", "main.cpp"],
+                "run": ["{dir}/main"],
+                "limit_address_space": True
+            },
+            "java": {
+                "source": "Main.java",
+                "compile": ["javac", f"-J-Xmx{compile_memory_limit_kb // 1024}m", "Main.java"],
+                "run": ["java", f"-Xmx{memory_limit_kb // 1024}m", "-cp", "{dir}", "Main"],
+                "limit_address_space": False
+            }
+        }
+    
+    def supports(self, language: str) -> bool:
+        return language in self.languages
+    
+    async def run_test_cases(self, source_code: str, language: str, test_cases: list, time_limit: int,
+                             on_result: Optional[Callable[[int, Dict[str, Any]], Awaitable[None]]] = None) -> List[Dict[str, Any]]:
+        """Run test cases locally and return one result per case, calling on_result as each finishes"""
+        
+        spec = self.languages.get(language)
+        if not spec:
+            return [
+                {"test_case": i + 1, "status": "error", "error": f"Unsupported language: {language}"}
+                for i in range(len(test_cases))
+            ]
+        
+        try:
+            artifact = await self.get_artifact(source_code, language, spec)
+        except SandboxError as e:
+            return [{"test_case": i + 1, "status": "error", "error": str(e)} for i in range(len(test_cases))]
+        if artifact["error"] is not None:
+            return [self.compile_error_result(i, artifact["error"]) for i in range(len(test_cases))]
+        
+        artifact["refs"] += 1
+        try:
+            command = [part.replace("{dir}", artifact["dir"]) for part in spec["run"]]
+            return list(await asyncio.gather(*(
+                self.run_test_case(i, test_case, command, spec, time_limit, on_result)
+                for i, test_case in enumerate(test_cases)
+            )))
+        finally:
+            artifact["refs"] -= 1
+    
+    async def get_artifact(self, source_code: str, language: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the compiled artifact for a source, compiling at most once per hash"""
+        
+        key = hashlib.sha256(f"{language}\0{source_code}".encode()).hexdigest()
+        if key in self.artifacts:
+            self.artifacts.move_to_end(key)
+            self.counters["artifact_hits"] += 1
+            return self.artifacts[key]
+        
+        if key in self.compiling:
+            self.counters["artifact_hits"] += 1
+            return await asyncio.shield(self.compiling[key])
+        
+        waiter = asyncio.get_running_loop().create_future()
+        self.compiling[key] = waiter
+        try:
+            artifact = await self.build_artifact(key, source_code, spec)
+            self.artifacts[key] = artifact
+            self.evict_artifacts()
+            waiter.set_result(artifact)
+            return artifact
+        except Exception as e:
+            waiter.set_exception(e)
+            waiter.exception()
+            raise
+        finally:
+            self.compiling.pop(key, None)
+    
+    async def build_artifact(self, key: str, source_code: str, spec: Dict[str, Any]) -> Dict[str, Any]:
+        """Write and compile a source into artifact_dir/<hash>"""
+        
+        artifact_path = os.path.join(self.artifact_dir, key)
+        artifact = {"dir": artifact_path, "error": None, "refs": 0}
+        
+        # Artifacts from a previous process are reused as-is when this user built them
+        if os.path.exists(os.path.join(artifact_path, ".compiled")) and self._owned_dir(artifact_path):
+            self.counters["artifact_hits"] += 1
+            return artifact
+        
+        build_path = tempfile.mkdtemp(dir=self.artifact_dir, prefix=f"{key}.build_")
+        try:
+            source_path = os.path.join(build_path, spec["source"])
+            with open(source_path, "w") as f:
+                f.write(source_code)
+            os.chmod(source_path, 0o644)
+            if self.run_as:
+                os.chown(build_path, *self.run_as)
+            
+            if spec["compile"]:
+                self.counters["compiles"] += 1
+                compiled = await self.run_in_pool(
+                    spec["compile"], build_path, "", self.compile_timeout,
+                    memory_limit_kb=self.compile_memory_limit_kb if spec["limit_address_space"] else None,
+                    output_bytes=self.max_artifact_bytes
+                )
+                if compiled["spawn_error"]:
+                    raise SandboxError(compiled["spawn_error"])
+                if compiled["exit_code"] != 0:
+                    self.counters["compile_errors"] += 1
+                    artifact["error"] = compiled["stderr"] or compiled["stdout"] or "Compilation failed"
+                    return artifact
+            
+            for name in ("stdin.txt", "stdout.txt", "stderr.txt"):
+                if os.path.exists(os.path.join(build_path, name)):
+                    os.remove(os.path.join(build_path, name))
+            if self.run_as:
+                # Take the compiler's output back so no submission can modify it
+                self._reclaim(build_path)
+            open(os.path.join(build_path, ".compiled"), "w").close()
+            
+            # Submissions only get read access to the shared artifact
+            os.chmod(build_path, 0o555)
+            try:
+                os.rename(build_path, artifact_path)
+            except OSError:
+                # Another process published the same artifact first; ours is cleaned up below
+                pass
+            return artifact
+            
+        finally:
+            if os.path.exists(build_path):
+                self._remove_dir(build_path)
+    
+    def evict_artifacts(self):
+        """Drop the least recently used artifacts that no run is holding"""
+        for key in list(self.artifacts):
+            if len(self.artifacts) <= self.max_artifacts:
+                break
+            artifact = self.artifacts[key]
+            if artifact["refs"] > 0:
+                continue
+            del self.artifacts[key]
+            if artifact["error"] is None:
+                self._remove_dir(artifact["dir"])
+    
+    def _remove_dir(self, path: str):
+        try:
+            os.chmod(path, 0o755)
+        except OSError:
+            pass
+        shutil.rmtree(path, ignore_errors=True)
+    
+    async def run_test_case(self, index: int, test_case: Dict[str, Any], command: List[str], spec: Dict[str, Any], time_limit: int,
+                            on_result: Optional[Callable[[int, Dict[str, Any]], Awaitable[None]]] = None) -> Dict[str, Any]:
+        """Run one test case in its own scratch directory"""
+        
+        with tempfile.TemporaryDirectory(prefix="case_") as case_dir:
+            if self.run_as:
+                os.chown(case_dir, *self.run_as)
+            run = await self.run_in_pool(
+                command, case_dir, test_case.get("input", ""), time_limit,
+                memory_limit_kb=self.memory_limit_kb if spec["limit_address_space"] else None,
+                output_bytes=self.max_output_bytes
+            )
+        
+        comparator = get_comparator(test_case.get("comparator") or self.default_comparator)
+        if run["spawn_error"]:
+            # The program never ran (e.g. EAGAIN under RLIMIT_NPROC); not a verdict on it
+            result = {"test_case": index + 1, "status": "error", "passed": False, "output": "",
+                      "error": run["spawn_error"], "time": 0, "memory": 0}
+        else:
+            status = self.status_description(run, test_case.get("expected", ""), comparator)
+            result = {
+                "test_case": index + 1,
+                "status": status,
+                "passed": status == "Accepted",
+                "output": run["stdout"],
+                "error": run["stderr"],
+                "time": run["time"],
+                "memory": run["memory"]
+            }
+        if on_result:
+            await on_result(index, result)
+        return result
+    
+    def compile_error_result(self, index: int, output: str) -> Dict[str, Any]:
+        return {
+            "test_case": index + 1,
+            "status": "Compilation Error",
+            "passed": False,
+            "output": "",
+            "error": output,
+            "time": 0,
+            "memory": 0
+        }
+    
+    def status_description(self, run: Dict[str, Any], expected: str, comparator: Callable[[str, str], bool]) -> str:
+        """Map a finished process onto Judge0's status descriptions"""
+        if run["timed_out"] or run["signal"] == signal.SIGXCPU:
+            return "Time Limit Exceeded"
+        if run["signal"] == signal.SIGXFSZ:
+            return "Runtime Error (SIGXFSZ)"
+        if run["signal"]:
+            return f"Runtime Error ({signal.Signals(run['signal']).name})"
+        if run["exit_code"] != 0:
+            return "Runtime Error (NZEC)"
+        if comparator(run["stdout"], expected):
+            return "Accepted"
+        return "Wrong Answer"
+    
+    async def run_in_pool(self, command: List[str], workdir: str, stdin: str, time_limit: float,
+                          memory_limit_kb: Optional[int], output_bytes: int) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.pool, self._run_process, command, workdir, stdin, time_limit, memory_limit_kb, output_bytes
+        )
+    
+    def _run_process(self, command: List[str], workdir: str, stdin: str, time_limit: float,
+                     memory_limit_kb: Optional[int], output_bytes: int) -> Dict[str, Any]:
+        stdin_path = os.path.join(workdir, "stdin.txt")
+        stdout_path = os.path.join(workdir, "stdout.txt")
+        stderr_path = os.path.join(workdir, "stderr.txt")
+        
+        with open(stdin_path, "w") as f:
+            f.write(stdin)
+        
+        command = self._limited(command, time_limit, memory_limit_kb, output_bytes)
+        
+        with open(stdin_path) as stdin_file, open(stdout_path, "w") as stdout_file, open(stderr_path, "w") as stderr_file:
+            try:
+                proc = subprocess.Popen(
+                    command,
+                    stdin=stdin_file,
+                    stdout=stdout_file,
+                    stderr=stderr_file,
+                    cwd=workdir,
+                    env=self._environment(workdir),
+                    start_new_session=True
+                )
+            except OSError as e:
+                return {"exit_code": -1, "signal": 0, "timed_out": False, "stdout": "", "stderr": str(e), "time": 0, "memory": 0,
+                        "spawn_error": f"Could not start process: {e}"}
+        
+        # RLIMIT_CPU only counts CPU time; the timer also catches sleeping or blocked programs
+        timed_out = threading.Event()
+        
+        def kill():
+            timed_out.set()
+            try:
+                os.killpg(proc.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        
+        timer = threading.Timer(time_limit * 2 + 1, kill)
+        timer.start()
+        try:
+            _, status, usage = os.wait4(proc.pid, 0)
+        finally:
+            timer.cancel()
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        stderr = self._read_capped(stderr_path)
+        spawn_error = None
+        if proc.returncode == 127 and stderr.startswith(_SANDBOX_ERROR):
+            spawn_error = stderr.strip()
+        
+        return {
+            "exit_code": proc.returncode,
+            "signal": -proc.returncode if proc.returncode < 0 else 0,
+            "timed_out": timed_out.is_set(),
+            "stdout": self._read_capped(stdout_path),
+            "stderr": stderr,
+            "time": round(usage.ru_utime + usage.ru_stime, 3),
+            "memory": usage.ru_maxrss,  # Peak RSS in KB (Judge0's unit); includes the fork baseline
+            "spawn_error": spawn_error
+        }
+    
+    def _limited(self, command: List[str], time_limit: float, memory_limit_kb: Optional[int], output_bytes: int) -> List[str]:
+        """Wrap a command so it execs under the CPU, output, memory and process limits"""
+        cpu_seconds = max(1, int(time_limit + 0.999))
+        memory_bytes = memory_limit_kb * 1024 if memory_limit_kb else 0
+        uid, gid = self.run_as or (-1, -1)
+        limits = [cpu_seconds, output_bytes, memory_bytes, self.max_processes, uid, gid]
+        return [sys.executable, "-I", "-S", "-c", _LIMIT_WRAPPER, *map(str, limits), *command]
+    
+    def _environment(self, workdir: str) -> Dict[str, str]:
+        """A minimal environment, so secrets in the server's environment never reach a submission.
+        
+        Files are another matter; see run_as_user.
+        """
+        return {
+            "PATH": os.environ.get("PATH", os.defpath),
+            "LANG": "C.UTF-8",
+            "HOME": workdir
+        }
+    
+    def _make_private_dir(self, path: str):
+        """Create path writable only by this user, or fix an existing one; refuse a directory another user controls.
+        
+        With a sandbox user the directory is 0711, so it can reach artifacts it knows the name of.
+        """
+        mode = 0o711 if self.run_as else 0o700
+        os.makedirs(path, mode=mode, exist_ok=True)
+        if not self._owned_dir(path):
+            raise RuntimeError(f"Artifact directory {path} is not a directory owned by this user")
+        if stat.S_IMODE(os.lstat(path).st_mode) != mode:
+            os.chmod(path, mode)
+    
+    def _resolve_user(self, user: str) -> Tuple[int, int]:
+        if os.geteuid() != 0:
+            raise RuntimeError("LOCAL_EXECUTOR_USER needs the server to run as root to switch users")
+        entry = pwd.getpwuid(int(user)) if user.isdigit() else pwd.getpwnam(user)
+        if entry.pw_uid == 0:
+            raise RuntimeError("LOCAL_EXECUTOR_USER must not be root")
+        return entry.pw_uid, entry.pw_gid
+    
+    def _reclaim(self, path: str):
+        """Own everything under path again, without following links the sandbox user planted"""
+        uid = os.getuid()
+        for root, dirs, files in os.walk(path):
+            for name in dirs + files:
+                os.lchown(os.path.join(root, name), uid, -1)
+        os.lchown(path, uid, -1)
+    
+    def _owned_dir(self, path: str) -> bool:
+        info = os.lstat(path)
+        return stat.S_ISDIR(info.st_mode) and info.st_uid == os.getuid()
+    
+    def _read_capped(self, path: str) -> str:
+        with open(path, "rb") as f:
+            return f.read(self.max_output_bytes).decode(errors="replace")
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_workers": self.max_workers,
+            "languages": list(self.languages),
+            "artifacts": len(self.artifacts),
+            **self.counters
+        }
+    
+    def close(self):
+        self.pool.shutdown(wait=False)
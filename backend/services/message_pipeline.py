@@ -0,0 +1,104 @@
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+class MessagePipeline:
+    """Runs a connection's messages concurrently while keeping each agent's messages in order.
+    
+    Every agent gets its own lane, a queue drained by one task, so a slow code
+    execution only delays later messages for the coding agent. Lanes share a
+    semaphore that caps how many messages of the session run at once. submit()
+    returns a future with the reply; when the lane is full it waits, which
+    stops the socket reader and pushes back on the client.
+    
+    close() drops queued messages but lets running ones finish, up to
+    close_timeout, so a handler is never interrupted halfway through
+    updating the session.
+    """
+    
+    def __init__(self, handle: Callable[[dict], Awaitable[dict]],
+                 max_concurrency: int = 4, max_queued: int = 32, close_timeout: float = 30):
+        self.handle = handle
+        self.max_queued = max_queued
+        self.close_timeout = close_timeout
+        self.slots = asyncio.Semaphore(max_concurrency)
+        
+        self.lanes: Dict[str, Tuple[asyncio.Queue, asyncio.Task]] = {}
+        self.closed = False
+        self.counters = {"submitted": 0, "completed": 0, "failed": 0, "dropped": 0}
+    
+    @classmethod
+    def from_env(cls, handle: Callable[[dict], Awaitable[dict]]) -> "MessagePipeline":
+        return cls(
+            handle,
+            max_concurrency=int(os.getenv("WS_MAX_CONCURRENCY", "4")),
+            max_queued=int(os.getenv("WS_MAX_QUEUED", "32")),
+            close_timeout=float(os.getenv("WS_CLOSE_TIMEOUT", "30"))
+        )
+    
+    async def submit(self, lane: str, message: dict) -> asyncio.Future:
+        if self.closed:
+            raise RuntimeError("Message pipeline is closed")
+        if lane not in self.lanes:
+            queue = asyncio.Queue(maxsize=self.max_queued)
+            self.lanes[lane] = (queue, asyncio.create_task(self._drain(queue)))
+        
+        future = asyncio.get_running_loop().create_future()
+        await self.lanes[lane][0].put((message, future))
+        self.counters["submitted"] += 1
+        return future
+    
+    async def _drain(self, queue: asyncio.Queue):
+        while True:
+            item = await queue.get()
+            if item is None:
+                # Sentinel from close(); everything before it has run
+                return
+            message, future = item
+            try:
+                async with self.slots:
+                    if self.closed:
+                        # Was still waiting for a slot, so it never started
+                        future.cancel()
+                        self.counters["dropped"] += 1
+                        continue
+                    response = await self.handle(message)
+                self.counters["completed"] += 1
+                if not future.done():
+                    future.set_result(response)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                self.counters["failed"] += 1
+                if not future.done():
+                    future.set_result({"error": f"Message processing failed: {e}"})
+    
+    def _drop_queued(self):
+        for queue, _ in self.lanes.values():
+            while not queue.empty():
+                item = queue.get_nowait()
+                if item is not None:
+                    item[1].cancel()
+                    self.counters["dropped"] += 1
+    
+    async def close(self):
+        """Drop queued messages and wait for running ones, e.g. once the client disconnects.
+        
+        Handlers still running after close_timeout are cancelled.
+        """
+        self.closed = True
+        self._drop_queued()
+        for queue, _ in self.lanes.values():
+            queue.put_nowait(None)
+        
+        tasks = [task for _, task in self.lanes.values()]
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=self.close_timeout)
+            for task in pending:
+                print("⚠ Cancelling a message handler that outlived WS_CLOSE_TIMEOUT")
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        # Submissions that were blocked on a full lane while closing
+        self._drop_queued()
+        self.lanes.clear()
@@ -0,0 +1,20 @@
+import os
+import threading
+from typing import Optional
+import openai
+
+_client: Optional[openai.OpenAI] = None
+_lock = threading.Lock()
+
+def get_openai_client() -> openai.OpenAI:
+    """The process-wide OpenAI client, created on first use.
+    
+    The client is thread-safe and pools its HTTP connections, so every agent
+    in every session shares this one instance.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
@@ -0,0 +1,64 @@
+import math
+import re
+from itertools import zip_longest
+from typing import Callable, Dict, Iterator
+
+_TOKEN = re.compile(r"\S+")
+_LINE = re.compile(r"[^\n]*\n|[^\n]+")
+
+def _judge0_normalize(text: str) -> str:
+    return "\n".join(line.rstrip() for line in text.split("\n")).strip()
+
+def compare_exact(actual: str, expected: str) -> bool:
+    """Judge0's rule: each line right-stripped, then leading/trailing whitespace of the whole ignored"""
+    return _judge0_normalize(actual) == _judge0_normalize(expected)
+
+def _lines(text: str) -> Iterator[str]:
+    """Lines with trailing whitespace dropped, ignoring trailing blank lines"""
+    pending_blank = 0
+    for match in _LINE.finditer(text):
+        line = match.group().rstrip()
+        if not line:
+            pending_blank += 1
+            continue
+        for _ in range(pending_blank):
+            yield ""
+        pending_blank = 0
+        yield line
+
+def compare_whitespace(actual: str, expected: str) -> bool:
+    """Line by line, ignoring trailing spaces and trailing blank lines"""
+    return all(a == e for a, e in zip_longest(_lines(actual), _lines(expected)))
+
+def _tokens(text: str) -> Iterator[str]:
+    return (match.group() for match in _TOKEN.finditer(text))
+
+def compare_tokens(actual: str, expected: str) -> bool:
+    """Whitespace-separated tokens must match exactly"""
+    return all(a == e for a, e in zip_longest(_tokens(actual), _tokens(expected)))
+
+def compare_float(actual: str, expected: str, tolerance: float = 1e-6) -> bool:
+    """Token-wise, with numbers equal within an absolute or relative tolerance"""
+    for a, e in zip_longest(_tokens(actual), _tokens(expected)):
+        if a is None or e is None:
+            return False
+        if a == e:
+            continue
+        try:
+            a_value, e_value = float(a), float(e)
+        except ValueError:
+            return False
+        if not math.isclose(a_value, e_value, rel_tol=tolerance, abs_tol=tolerance):
+            return False
+    return True
+
+COMPARATORS: Dict[str, Callable[[str, str], bool]] = {
+    "exact": compare_exact,
+    "whitespace": compare_whitespace,
+    "token": compare_tokens,
+    "float": compare_float
+}
+
+def get_comparator(name: str) -> Callable[[str, str], bool]:
+    """Look a comparator up by name, falling back to exact"""
+    return COMPARATORS.get(name or "exact", compare_exact)
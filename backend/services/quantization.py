@@ -0,0 +1,38 @@
+import numpy as np
+from typing import Tuple
+
+# Storage dtype per quantization mode; int8 also keeps one float32 scale per vector
+QUANTIZATION_DTYPES = {
+    "none": np.float32,
+    "float16": np.float16,
+    "int8": np.int8
+}
+
+def quantize(vectors: np.ndarray, mode: str = "none") -> Tuple[np.ndarray, np.ndarray]:
+    """Encode rows as (codes, per-row scales)"""
+    vectors = np.atleast_2d(np.asarray(vectors, dtype=np.float32))
+    scales = np.ones(len(vectors), dtype=np.float32)
+    
+    if mode == "int8":
+        peaks = np.abs(vectors).max(axis=1)
+        scales = np.where(peaks > 0, peaks / 127.0, 1.0).astype(np.float32)
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales
+    
+    return vectors.astype(QUANTIZATION_DTYPES[mode]), scales
+
+def dequantize(codes: np.ndarray, scales: np.ndarray, mode: str = "none") -> np.ndarray:
+    """Approximate float32 rows back from codes"""
+    vectors = codes.astype(np.float32)
+    if mode == "int8":
+        vectors *= scales[:, None]
+    return vectors
+
+def quantized_scores(codes: np.ndarray, scales: np.ndarray, query: np.ndarray, mode: str = "none") -> np.ndarray:
+    """Dot products of query with encoded rows, scaled back for int8"""
+    if mode == "none":
+        return codes @ query
+    scores = codes.astype(np.float32) @ query
+    if mode == "int8":
+        scores *= scales
+    return scores
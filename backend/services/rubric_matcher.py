@@ -0,0 +1,81 @@
+import re
+import numpy as np
+from typing import List, Dict, Any
+
+class CompiledRubric:
+    """A rubric's keywords compiled into one matcher that tags every competency in a single pass"""
+    
+    def __init__(self, rubric: Dict[str, Any]):
+        self.competencies: List[str] = list(rubric.get("competencies", {}))
+        keyword_sets = [
+            {keyword.lower() for keyword in rubric["competencies"][name].get("keywords", [])}
+            for name in self.competencies
+        ]
+        self.keyword_counts = np.array([max(len(keywords), 1) for keywords in keyword_sets], dtype=np.float64)
+        
+        # keyword -> column in the per-response hit vector
+        self.keywords: List[str] = sorted(set().union(*keyword_sets), key=lambda k: (-len(k), k))
+        self.columns = {keyword: column for column, keyword in enumerate(self.keywords)}
+        
+        # Keyword columns -> competencies, so a hit vector reduces to match counts with one product
+        self.membership = np.zeros((len(self.keywords), len(self.competencies)), dtype=np.float64)
+        for competency, keywords in enumerate(keyword_sets):
+            for keyword in keywords:
+                self.membership[self.columns[keyword], competency] = 1.0
+        
+        # Every keyword that starts where the longest match starts is a prefix of it
+        self.prefixes = {
+            keyword: [self.columns[k] for k in self.keywords if keyword.startswith(k)]
+            for keyword in self.keywords
+        }
+        
+        # Keywords match at the start of a word, like "optimize" in "optimized"
+        alternation = "|".join(re.escape(keyword) for keyword in self.keywords)
+        self.pattern = re.compile(rf"\b(?=({alternation}))") if self.keywords else None
+    
+    def hits(self, content: str) -> np.ndarray:
+        """Boolean vector of the keywords present in content"""
+        hits = np.zeros(len(self.keywords), dtype=bool)
+        if self.pattern is not None and content:
+            for match in self.pattern.finditer(content.lower()):
+                hits[self.prefixes[match.group(1)]] = True
+        return hits
+    
+    def keyword_scores(self, contents: List[str]) -> np.ndarray:
+        """Per-response, per-competency share of keywords matched, capped at 1"""
+        if not contents:
+            return np.zeros((0, len(self.competencies)))
+        hit_matrix = np.array([self.hits(content) for content in contents], dtype=np.float64)
+        return np.minimum(hit_matrix @ self.membership / self.keyword_counts, 1.0)
+
+class CompetencyTally:
+    """Running competency score sums for one session under one rubric"""
+    
+    def __init__(self, rubric: CompiledRubric):
+        self.rubric = rubric
+        self.responses = 0
+        self.totals = np.zeros(len(rubric.competencies), dtype=np.float64)
+    
+    def update(self, contents: List[str]):
+        """Fold in responses stored since the last update"""
+        new_contents = contents[self.responses:]
+        if not new_contents:
+            return
+        
+        keyword_scores = self.rubric.keyword_scores(new_contents)
+        # Simulate context understanding (in production, use semantic similarity); drawn once per response
+        context_scores = np.random.uniform(0.6, 1.0, size=keyword_scores.shape)
+        
+        self.totals += ((keyword_scores * 0.6 + context_scores * 0.4) * 100).sum(axis=0)
+        self.responses += len(new_contents)
+    
+    def score_array(self) -> np.ndarray:
+        """Average score per competency, in rubric order"""
+        if self.responses == 0:
+            return np.zeros(len(self.rubric.competencies))
+        return np.minimum(self.totals / self.responses, 100)
+    
+    def scores(self) -> Dict[str, float]:
+        if self.responses == 0:
+            return {name: 0 for name in self.rubric.competencies}
+        return {name: float(score) for name, score in zip(self.rubric.competencies, self.score_array())}
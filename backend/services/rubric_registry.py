@@ -0,0 +1,213 @@
+import asyncio
+import json
+import os
+import numpy as np
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import List, Dict, Any, Optional, Tuple, Mapping
+from .rubric_matcher import CompiledRubric
+
+try:
+    import yaml
+except ImportError:  # YAML rubrics are skipped without PyYAML
+    yaml = None
+
+RUBRIC_EXTENSIONS = (".json", ".yaml", ".yml")
+
+def _freeze(value: Any) -> Any:
+    """Read-only copy of nested rubric data: mappings become proxies, lists tuples"""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+def _thaw(value: Any) -> Any:
+    if isinstance(value, Mapping):
+        return {key: _thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [_thaw(item) for item in value]
+    return value
+
+# Plans are compared and hashed by identity: a reload always publishes new objects
+@dataclass(frozen=True, eq=False)
+class RubricPlan:
+    """A validated rubric precompiled for scoring; every field, arrays included, is read-only"""
+    
+    rubric_id: str
+    role: str
+    competencies: Tuple[str, ...]
+    weights: np.ndarray     # (competencies,)
+    levels: Tuple[str, ...]
+    benchmarks: np.ndarray  # (levels, competencies); NaN where a level has no benchmark
+    matcher: CompiledRubric
+    definition: Mapping[str, Any]
+    source: str
+    
+    def as_dict(self) -> Dict[str, Any]:
+        """The rubric as the plain dict get_rubric has always returned"""
+        return _thaw(self.definition)
+    
+    def overall_score(self, scores: np.ndarray) -> float:
+        """Weighted mean of per-competency scores given in plan order"""
+        total = self.weights.sum()
+        return float(scores @ self.weights / total) if total > 0 else 0.0
+    
+    def benchmark_gaps(self, scores: np.ndarray, level: str) -> Dict[str, float]:
+        """Score minus the level's benchmark for each competency that has one"""
+        if level not in self.levels:
+            return {}
+        benchmarks = self.benchmarks[self.levels.index(level)]
+        gaps = scores - benchmarks
+        return {self.competencies[i]: float(gaps[i]) for i in np.flatnonzero(~np.isnan(benchmarks))}
+
+def compile_plan(rubric_id: str, definition: Dict[str, Any], source: str = "default") -> RubricPlan:
+    """Validate a rubric definition and precompute its arrays and keyword matcher"""
+    if not isinstance(definition, dict):
+        raise ValueError(f"{rubric_id}: rubric must be a mapping")
+    competencies = definition.get("competencies")
+    if not isinstance(competencies, dict) or not competencies:
+        raise ValueError(f"{rubric_id}: 'competencies' must be a non-empty mapping")
+    
+    names = tuple(competencies)
+    levels: List[str] = []
+    for name, config in competencies.items():
+        if not isinstance(config, dict):
+            raise ValueError(f"{rubric_id}.{name}: competency must be a mapping")
+        weight = config.get("weight", 0)
+        if not isinstance(weight, (int, float)) or weight < 0:
+            raise ValueError(f"{rubric_id}.{name}: 'weight' must be a non-negative number")
+        keywords = config.get("keywords", [])
+        if not isinstance(keywords, list) or not all(isinstance(k, str) and k.strip() for k in keywords):
+            raise ValueError(f"{rubric_id}.{name}: 'keywords' must be a list of strings")
+        benchmarks = config.get("benchmarks", {})
+        if not isinstance(benchmarks, dict) or not all(isinstance(v, (int, float)) for v in benchmarks.values()):
+            raise ValueError(f"{rubric_id}.{name}: 'benchmarks' must map levels to numbers")
+        levels.extend(level for level in benchmarks if level not in levels)
+    
+    weights = np.array([competencies[name].get("weight", 0) for name in names], dtype=np.float64)
+    benchmarks = np.array([
+        [competencies[name].get("benchmarks", {}).get(level, np.nan) for name in names]
+        for level in levels
+    ], dtype=np.float64).reshape(len(levels), len(names))
+    weights.flags.writeable = False
+    benchmarks.flags.writeable = False
+    
+    return RubricPlan(
+        rubric_id=rubric_id,
+        role=str(definition.get("role", rubric_id)),
+        competencies=names,
+        weights=weights,
+        levels=tuple(levels),
+        benchmarks=benchmarks,
+        matcher=CompiledRubric(definition),
+        definition=_freeze(definition),
+        source=source
+    )
+
+def read_rubric_file(path: str) -> Dict[str, Dict[str, Any]]:
+    """Rubric definitions in a file: either {"id": ..., "competencies": ...} or {rubric_id: definition}"""
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            data = json.load(f)
+        elif yaml is None:
+            raise ValueError("PyYAML is not installed")
+        else:
+            data = yaml.safe_load(f)
+    
+    if not isinstance(data, dict):
+        raise ValueError("file must contain a mapping")
+    if "competencies" in data:
+        rubric_id = data.get("id") or os.path.splitext(os.path.basename(path))[0]
+        return {rubric_id: {k: v for k, v in data.items() if k != "id"}}
+    return data
+
+class RubricRegistry:
+    """Rubric plans from built-in defaults plus a directory of JSON/YAML files, hot-reloaded on change"""
+    
+    def __init__(self, directory: Optional[str] = None, poll_interval: float = 5.0):
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.defaults: Dict[str, RubricPlan] = {}
+        
+        # Replaced wholesale on reload, so readers always see one consistent set
+        self.plans: Mapping[str, RubricPlan] = MappingProxyType({})
+        self.file_plans: Dict[str, Dict[str, RubricPlan]] = {}
+        self.signature: Dict[str, Tuple[int, int]] = {}
+        self.errors: Dict[str, str] = {}
+        self.version = 0
+        self.watch_task: Optional[asyncio.Task] = None
+    
+    def set_defaults(self, rubrics: Dict[str, Dict[str, Any]]):
+        self.defaults = {rubric_id: compile_plan(rubric_id, definition) for rubric_id, definition in rubrics.items()}
+        self._publish()
+    
+    def get(self, rubric_id: str) -> Optional[RubricPlan]:
+        return self.plans.get(rubric_id)
+    
+    def reload(self) -> bool:
+        """Re-read changed rubric files; returns True when the published set changed"""
+        if not self.directory or not os.path.isdir(self.directory):
+            return False
+        
+        signature = {}
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if name.endswith(RUBRIC_EXTENSIONS) and os.path.isfile(path):
+                stat = os.stat(path)
+                signature[path] = (stat.st_mtime_ns, stat.st_size)
+        if signature == self.signature:
+            return False
+        
+        file_plans = {path: plans for path, plans in self.file_plans.items() if path in signature}
+        for path, file_signature in signature.items():
+            if self.signature.get(path) == file_signature:
+                continue
+            try:
+                definitions = read_rubric_file(path)
+                file_plans[path] = {
+                    rubric_id: compile_plan(rubric_id, definition, source=path)
+                    for rubric_id, definition in definitions.items()
+                }
+                self.errors.pop(path, None)
+            except Exception as e:
+                # A broken edit keeps the file's last good rubrics
+                self.errors[path] = str(e)
+                print(f"Error loading rubric file {path}: {e}")
+        
+        self.signature = signature
+        self.file_plans = file_plans
+        self._publish()
+        return True
+    
+    async def watch(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await asyncio.to_thread(self.reload)
+            except Exception as e:
+                print(f"Error reloading rubrics: {e}")
+    
+    def start(self):
+        if self.directory and self.watch_task is None:
+            self.watch_task = asyncio.create_task(self.watch())
+    
+    def stop(self):
+        if self.watch_task:
+            self.watch_task.cancel()
+            self.watch_task = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "rubrics": {rubric_id: plan.source for rubric_id, plan in self.plans.items()},
+            "errors": dict(self.errors)
+        }
+    
+    def _publish(self):
+        plans = dict(self.defaults)
+        # Files override defaults; files later in name order win among themselves
+        for path in sorted(self.file_plans):
+            plans.update(self.file_plans[path])
+        self.plans = MappingProxyType(plans)
+        self.version += 1
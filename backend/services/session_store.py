@@ -0,0 +1,414 @@
+import abc
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional
+
+from ..models.interview import InterviewSession
+
+try:
+    import redis.asyncio as redis_asyncio
+except ImportError:  # the in-process stand-in is used without redis
+    redis_asyncio = None
+
+def serialize_session(session: InterviewSession) -> str:
+    """Session snapshot with each live agent replaced by its exported state"""
+    agents = session.agents
+    state = agents.export_state() if hasattr(agents, "export_state") else {}
+    return session.copy(update={"agents": state}).json()
+
+def deserialize_session(data: str) -> InterviewSession:
+    return InterviewSession.parse_raw(data)
+
+class PersistentSessionBackend(abc.ABC):
+    """Where sessions go when they leave RAM"""
+    
+    # Whether other worker processes see the same data (required in multi-worker mode)
+    shared = False
+    
+    @abc.abstractmethod
+    async def load(self, session_id: str) -> Optional[InterviewSession]:
+        ...
+    
+    @abc.abstractmethod
+    async def save(self, session: InterviewSession, ttl: Optional[float] = None):
+        ...
+    
+    @abc.abstractmethod
+    async def delete(self, session_id: str):
+        ...
+    
+    @abc.abstractmethod
+    async def save_status(self, session_id: str, status: Dict[str, Any], ttl: Optional[float] = None):
+        """Publish a session's status summary for other workers"""
+    
+    @abc.abstractmethod
+    async def load_status(self, session_id: str) -> Optional[Dict[str, Any]]:
+        ...
+    
+    async def close(self):
+        pass
+
+class SQLiteSessionBackend(PersistentSessionBackend):
+    """Session snapshots in a local SQLite file"""
+    
+    # Workers on the same host open the same file
+    shared = True
+    
+    def __init__(self, path: str = "sessions.db"):
+        self.path = path
+        self.connection = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        # Several worker processes may share the file in multi-worker mode
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, status TEXT, updated_at REAL, expires_at REAL)"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS session_status (session_id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL)"
+        )
+        self.connection.commit()
+        # One connection shared by worker threads
+        self.lock = asyncio.Lock()
+    
+    async def load(self, session_id: str) -> Optional[InterviewSession]:
+        async with self.lock:
+            row = await asyncio.to_thread(self._load, session_id)
+        return deserialize_session(row[0]) if row else None
+    
+    async def save(self, session: InterviewSession, ttl: Optional[float] = None):
+        data = serialize_session(session)
+        expires_at = time.time() + ttl if ttl else None
+        async with self.lock:
+            await asyncio.to_thread(self._save, session.session_id, data, session.status, expires_at)
+    
+    async def delete(self, session_id: str):
+        async with self.lock:
+            await asyncio.to_thread(self._execute, "DELETE FROM sessions WHERE session_id = ?", (session_id,))
+            await asyncio.to_thread(self._execute, "DELETE FROM session_status WHERE session_id = ?", (session_id,))
+    
+    async def save_status(self, session_id: str, status: Dict[str, Any], ttl: Optional[float] = None):
+        expires_at = time.time() + ttl if ttl else None
+        async with self.lock:
+            await asyncio.to_thread(
+                self._execute,
+                "INSERT OR REPLACE INTO session_status (session_id, data, expires_at) VALUES (?, ?, ?)",
+                (session_id, json.dumps(status, default=str), expires_at)
+            )
+    
+    async def load_status(self, session_id: str) -> Optional[Dict[str, Any]]:
+        async with self.lock:
+            row = await asyncio.to_thread(self._load_status, session_id)
+        return json.loads(row[0]) if row else None
+    
+    async def close(self):
+        async with self.lock:
+            await asyncio.to_thread(self.connection.close)
+    
+    def _load(self, session_id: str):
+        return self.connection.execute(
+            "SELECT data FROM sessions WHERE session_id = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (session_id, time.time())
+        ).fetchone()
+    
+    def _load_status(self, session_id: str):
+        return self.connection.execute(
+            "SELECT data FROM session_status WHERE session_id = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (session_id, time.time())
+        ).fetchone()
+    
+    def _save(self, session_id: str, data: str, status: str, expires_at: Optional[float]):
+        self.connection.execute(
+            "INSERT OR REPLACE INTO sessions (session_id, data, status, updated_at, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (session_id, data, status, time.time(), expires_at)
+        )
+        # Expired snapshots are cleared as writes happen
+        self.connection.execute("DELETE FROM sessions WHERE expires_at IS NOT NULL AND expires_at <= ?", (time.time(),))
+        self.connection.commit()
+    
+    def _execute(self, statement: str, parameters: tuple):
+        self.connection.execute(statement, parameters)
+        self.connection.commit()
+
+class LocalKeyValueClient:
+    """In-process stand-in for the subset of the redis.asyncio client the session store uses"""
+    
+    def __init__(self):
+        self.data: Dict[str, tuple] = {}
+    
+    async def get(self, key: str) -> Optional[str]:
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+    
+    async def set(self, key: str, value: str, ex: Optional[int] = None):
+        self.data[key] = (value, time.monotonic() + ex if ex else None)
+    
+    async def delete(self, *keys: str):
+        for key in keys:
+            self.data.pop(key, None)
+    
+    async def close(self):
+        pass
+
+class RedisSessionBackend(PersistentSessionBackend):
+    """Session snapshots under "<prefix><session_id>" keys of a Redis-compatible client"""
+    
+    def __init__(self, client: Any, prefix: str = "interview:session:", status_prefix: str = "interview:status:"):
+        self.client = client
+        # The in-process stand-in is private to each worker
+        self.shared = not isinstance(client, LocalKeyValueClient)
+        self.prefix = prefix
+        self.status_prefix = status_prefix
+    
+    async def load(self, session_id: str) -> Optional[InterviewSession]:
+        data = await self.client.get(self.prefix + session_id)
+        if data is None:
+            return None
+        return deserialize_session(data.decode() if isinstance(data, bytes) else data)
+    
+    async def save(self, session: InterviewSession, ttl: Optional[float] = None):
+        await self.client.set(self.prefix + session.session_id, serialize_session(session), ex=int(ttl) if ttl else None)
+    
+    async def delete(self, session_id: str):
+        await self.client.delete(self.prefix + session_id, self.status_prefix + session_id)
+    
+    async def save_status(self, session_id: str, status: Dict[str, Any], ttl: Optional[float] = None):
+        await self.client.set(self.status_prefix + session_id, json.dumps(status, default=str), ex=int(ttl) if ttl else None)
+    
+    async def load_status(self, session_id: str) -> Optional[Dict[str, Any]]:
+        data = await self.client.get(self.status_prefix + session_id)
+        return json.loads(data) if data is not None else None
+    
+    async def close(self):
+        await self.client.close()
+
+class SessionStore:
+    """Live sessions in an LRU with idle/completed TTLs and a size budget.
+    
+    Sessions leaving memory are written to the persistent backend, when there
+    is one, and restored from it on the next access; restore() rebuilds the
+    agents a snapshot does not carry. Sessions with an open WebSocket are
+    pinned and never evicted. Without a backend eviction would lose the
+    session, so only completed sessions are dropped; unfinished ones stay
+    in memory past the budget and are counted as over_budget in stats().
+    """
+    
+    def __init__(self, backend: Optional[PersistentSessionBackend] = None,
+                 restore: Optional[Callable[[InterviewSession], None]] = None,
+                 max_sessions: int = 1000, idle_ttl: float = 1800, completed_ttl: float = 300,
+                 persisted_ttl: float = 7 * 24 * 3600, sweep_interval: float = 30):
+        self.backend = backend
+        self.restore = restore
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.completed_ttl = completed_ttl
+        self.persisted_ttl = persisted_ttl
+        self.sweep_interval = sweep_interval
+        
+        # session_id -> session, least recently used first
+        self.sessions: "OrderedDict[str, InterviewSession]" = OrderedDict()
+        self.last_access: Dict[str, float] = {}
+        self.completed_at: Dict[str, float] = {}
+        self.pins: Dict[str, int] = {}
+        self.sweep_task: Optional[asyncio.Task] = None
+        self.counters = {"evicted": 0, "restored": 0, "expired": 0}
+        self.over_budget = 0
+    
+    def __len__(self) -> int:
+        return len(self.sessions)
+    
+    async def get(self, session_id: str) -> Optional[InterviewSession]:
+        session = self.sessions.get(session_id)
+        if session is None and self.backend is not None:
+            session = await self.backend.load(session_id)
+            if session_id in self.sessions:
+                # Restored concurrently by another request
+                session = self.sessions[session_id]
+            elif session is not None:
+                if self.restore:
+                    self.restore(session)
+                self.counters["restored"] += 1
+                await self.put(session)
+                if session.status == "completed":
+                    self.completed_at[session_id] = time.monotonic()
+        if session is not None:
+            self._touch(session_id)
+        return session
+    
+    async def put(self, session: InterviewSession):
+        self.sessions[session.session_id] = session
+        self._touch(session.session_id)
+        await self._enforce_budget()
+    
+    async def complete(self, session_id: str):
+        """Mark a session finished; it leaves memory after completed_ttl"""
+        self.completed_at[session_id] = time.monotonic()
+        session = self.sessions.get(session_id)
+        if session is not None and self.backend is not None:
+            await self.backend.save(session, self.persisted_ttl)
+    
+    async def delete(self, session_id: str):
+        self._forget(session_id)
+        if self.backend is not None:
+            await self.backend.delete(session_id)
+    
+    async def publish_status(self, session: InterviewSession, owner: Optional[int] = None):
+        """Share status and scores through the backend so any worker can answer status requests"""
+        if self.backend is None:
+            return
+        await self.backend.save_status(session.session_id, {
+            "session_id": session.session_id,
+            "status": session.status,
+            "current_phase": session.current_phase,
+            "message_count": len(session.messages),
+            "scores": session.scores.dict(),
+            "owner": owner
+        }, self.persisted_ttl)
+    
+    async def load_status(self, session_id: str) -> Optional[Dict[str, Any]]:
+        if self.backend is None:
+            return None
+        return await self.backend.load_status(session_id)
+    
+    def pin(self, session_id: str):
+        self.pins[session_id] = self.pins.get(session_id, 0) + 1
+    
+    def unpin(self, session_id: str):
+        remaining = self.pins.get(session_id, 0) - 1
+        if remaining > 0:
+            self.pins[session_id] = remaining
+        else:
+            self.pins.pop(session_id, None)
+            self._touch(session_id)
+    
+    async def sweep(self):
+        """Move completed and idle sessions out of memory"""
+        now = time.monotonic()
+        for session_id in list(self.sessions):
+            if session_id in self.pins:
+                continue
+            completed_at = self.completed_at.get(session_id)
+            if completed_at is not None and now - completed_at >= self.completed_ttl:
+                if await self.evict(session_id):
+                    self.counters["expired"] += 1
+            elif now - self.last_access.get(session_id, now) >= self.idle_ttl:
+                if await self.evict(session_id):
+                    self.counters["expired"] += 1
+    
+    def evictable(self, session_id: str) -> bool:
+        """Whether the session can leave memory without being lost"""
+        if session_id in self.pins:
+            return False
+        return self.backend is not None or session_id in self.completed_at
+    
+    async def evict(self, session_id: str) -> bool:
+        """Move a session out of memory; returns False when it has to stay"""
+        session = self.sessions.get(session_id)
+        if session is None or not self.evictable(session_id):
+            return False
+        if self.backend is not None:
+            accessed = self.last_access.get(session_id)
+            await self.backend.save(session, self.persisted_ttl)
+            # A WebSocket or request may have picked the session up during the save;
+            # dropping it now would leave two live copies
+            if self.sessions.get(session_id) is not session or not self.evictable(session_id) \
+                    or self.last_access.get(session_id) != accessed:
+                return False
+        self._forget(session_id)
+        self.counters["evicted"] += 1
+        return True
+    
+    async def run_sweeper(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f"Error sweeping sessions: {e}")
+    
+    def start(self):
+        if self.sweep_task is None:
+            self.sweep_task = asyncio.create_task(self.run_sweeper())
+    
+    async def close(self):
+        """Persist everything still in memory and release the backend"""
+        if self.sweep_task:
+            self.sweep_task.cancel()
+            self.sweep_task = None
+        if self.backend is not None:
+            for session in list(self.sessions.values()):
+                await self.backend.save(session, self.persisted_ttl)
+            await self.backend.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "in_memory": len(self.sessions),
+            "max_sessions": self.max_sessions,
+            "pinned": len(self.pins),
+            "over_budget": self.over_budget,
+            "completed_in_memory": len(self.completed_at),
+            "backend": type(self.backend).__name__ if self.backend else None
+        }
+    
+    def _touch(self, session_id: str):
+        if session_id in self.sessions:
+            self.sessions.move_to_end(session_id)
+            self.last_access[session_id] = time.monotonic()
+    
+    def _forget(self, session_id: str):
+        self.sessions.pop(session_id, None)
+        self.last_access.pop(session_id, None)
+        self.completed_at.pop(session_id, None)
+    
+    async def _enforce_budget(self):
+        overflow = len(self.sessions) - self.max_sessions
+        if overflow <= 0:
+            self.over_budget = 0
+            return
+        # Completed sessions go first, then the least recently used unpinned ones
+        victims: List[str] = [s for s in self.sessions if s in self.completed_at]
+        victims += [s for s in self.sessions if s not in self.completed_at]
+        victims = [s for s in victims if self.evictable(s)]
+        for session_id in victims[:overflow]:
+            await self.evict(session_id)
+        
+        was_over = self.over_budget
+        self.over_budget = max(0, len(self.sessions) - self.max_sessions)
+        if self.over_budget and not was_over:
+            print(f"⚠ {len(self.sessions)} sessions in memory exceed SESSION_MAX_IN_MEMORY={self.max_sessions}; "
+                  "unfinished sessions are kept because there is no persistent backend")
+
+def create_session_store(restore: Optional[Callable[[InterviewSession], None]] = None) -> SessionStore:
+    """Build the session store from SESSION_STORE (memory, sqlite or redis) and related settings"""
+    kind = os.getenv("SESSION_STORE", "memory")
+    backend: Optional[PersistentSessionBackend] = None
+    if kind == "sqlite":
+        backend = SQLiteSessionBackend(os.getenv("SESSION_DB_PATH", "sessions.db"))
+    elif kind == "redis":
+        redis_url = os.getenv("REDIS_URL")
+        if redis_url and redis_asyncio is not None:
+            client = redis_asyncio.from_url(redis_url)
+        else:
+            print("⚠ REDIS_URL or the redis package is missing; using the in-process stand-in")
+            client = LocalKeyValueClient()
+        backend = RedisSessionBackend(client)
+    
+    return SessionStore(
+        backend,
+        restore=restore,
+        max_sessions=int(os.getenv("SESSION_MAX_IN_MEMORY", "1000")),
+        idle_ttl=float(os.getenv("SESSION_IDLE_TTL", "1800")),
+        completed_ttl=float(os.getenv("SESSION_COMPLETED_TTL", "300")),
+        persisted_ttl=float(os.getenv("SESSION_PERSISTED_TTL", str(7 * 24 * 3600))),
+        sweep_interval=float(os.getenv("SESSION_SWEEP_INTERVAL", "30"))
+    )
@@ -0,0 +1,45 @@
+import os
+import re
+import uuid
+import zlib
+from typing import List, Optional
+
+_SHARDED_ID = re.compile(r"^session_(\d+)_[0-9a-f]+$")
+
+class ShardMap:
+    """Which worker owns which session.
+    
+    Session ids carry their owner as "session_<shard>_<hex>". Ids without a
+    shard (created before multi-worker mode) hash onto a shard instead.
+    """
+    
+    def __init__(self, shard: int = 0, worker_urls: Optional[List[str]] = None):
+        self.worker_urls = [url.rstrip("/") for url in (worker_urls or [])]
+        self.shard_count = max(len(self.worker_urls), 1)
+        self.shard = shard
+    
+    @classmethod
+    def from_env(cls) -> "ShardMap":
+        urls = [url.strip() for url in os.getenv("WORKER_URLS", "").split(",") if url.strip()]
+        return cls(int(os.getenv("WORKER_SHARD", "0")), urls)
+    
+    @property
+    def multi_worker(self) -> bool:
+        return self.shard_count > 1
+    
+    def new_session_id(self) -> str:
+        return f"session_{self.shard}_{uuid.uuid4().hex}"
+    
+    def shard_of(self, session_id: str) -> int:
+        match = _SHARDED_ID.match(session_id)
+        if match and int(match.group(1)) < self.shard_count:
+            return int(match.group(1))
+        return zlib.crc32(session_id.encode()) % self.shard_count
+    
+    def owns(self, session_id: str) -> bool:
+        return self.shard_of(session_id) == self.shard
+    
+    def url_for(self, session_id: str) -> Optional[str]:
+        if not self.worker_urls:
+            return None
+        return self.worker_urls[self.shard_of(session_id)]
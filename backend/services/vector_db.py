@@ -1,8 +1,18 @@
 import os
 import numpy as np
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Union
 import asyncio
 import json
+import time
+from collections import OrderedDict
+from urllib.parse import quote, unquote
+from .vector_store import SessionVectorStore
+from .ann_index import IVFFlatIndex
+from .embeddings import create_embedder
+from .rubric_matcher import CompetencyTally
+from .rubric_registry import RubricRegistry, RubricPlan
+from .write_batcher import WriteBehindBatcher
+from .lexical_index import InvertedIndex
 
 class VectorDBService:
     """Service for vector database operations (simulated)"""
@@ -13,9 +23,70 @@ class VectorDBService:
         self.index_name = "interview-rubrics"
         self.initialized = False
         
-        # Simulated vector storage
-        self.vectors = {}
-        self.rubrics = {}
+        # Per-session vector matrices (simulated index)
+        self.dimension = 384
+        self.vectors: Dict[str, SessionVectorStore] = {}
+        
+        # With VECTOR_DATA_DIR each session is an append-only on-disk segment; only the
+        # most recently used sessions keep their matrix in memory, the rest are memory-mapped
+        self.data_dir = os.getenv("VECTOR_DATA_DIR")
+        self.max_hot_sessions = int(os.getenv("VECTOR_MAX_HOT_SESSIONS", "64"))
+        self.hot_sessions: "OrderedDict[str, None]" = OrderedDict()
+        
+        # BM25 index per session, row-aligned with the session's vectors
+        self.lexical_indexes: Dict[str, InvertedIndex] = {}
+        
+        # Retention: completed sessions expire after VECTOR_SESSION_TTL seconds (archived to
+        # VECTOR_DATA_DIR when set, otherwise dropped) and the least recently used sessions are
+        # evicted whenever resident session data exceeds VECTOR_MEMORY_BUDGET_BYTES
+        self.session_ttl = float(os.getenv("VECTOR_SESSION_TTL", "3600"))
+        self.memory_budget = int(os.getenv("VECTOR_MEMORY_BUDGET_BYTES", str(256 * 1024 * 1024)))
+        self.retention_interval = float(os.getenv("VECTOR_RETENTION_INTERVAL", "60"))
+        self.session_access: "OrderedDict[str, float]" = OrderedDict()
+        self.completed_sessions: Dict[str, float] = {}
+        self.retention_task: Optional[asyncio.Task] = None
+        self.retention_counters = {"expired": 0, "evicted": 0, "archived": 0, "dropped": 0, "index_rows_evicted": 0}
+        
+        # Built-in rubrics plus any JSON/YAML files in RUBRIC_DIR, precompiled and hot-reloaded
+        self.rubric_registry = RubricRegistry(
+            os.getenv("RUBRIC_DIR"),
+            poll_interval=float(os.getenv("RUBRIC_RELOAD_INTERVAL", "5"))
+        )
+        
+        # Running competency scores per session and rubric
+        self.competency_tallies: Dict[str, Dict[str, CompetencyTally]] = {}
+        
+        # Deterministic local embedder behind an LRU cache (EMBEDDING_BACKEND picks another)
+        self.embedder = create_embedder(
+            os.getenv("EMBEDDING_BACKEND"),
+            self.dimension,
+            int(os.getenv("EMBEDDING_CACHE_SIZE", "10000"))
+        )
+        
+        # Cross-session ANN index over every stored response; nprobe trades
+        # recall for latency and VECTOR_INDEX_PATH holds an offline-built index.
+        # Quantized (float16/int8) indexes re-rank against the session vectors.
+        self.index_path = os.getenv("VECTOR_INDEX_PATH")
+        self.index_params = {
+            "nlist": int(os.getenv("VECTOR_INDEX_NLIST", "0")) or None,
+            "nprobe": int(os.getenv("VECTOR_INDEX_NPROBE", "8")),
+            "train_threshold": int(os.getenv("VECTOR_INDEX_TRAIN_THRESHOLD", "1024")),
+            "quantization": os.getenv("VECTOR_INDEX_QUANTIZATION", "none"),
+            "rerank_factor": int(os.getenv("VECTOR_INDEX_RERANK_FACTOR", "4")),
+            "vector_loader": self.load_vectors
+        }
+        self.global_index = IVFFlatIndex(self.dimension, **self.index_params)
+        self.background_tasks = set()
+        # The index counts against VECTOR_MEMORY_BUDGET_BYTES and holds at most
+        # VECTOR_INDEX_MAX_VECTORS rows; the oldest responses age out first
+        self.index_max_vectors = int(os.getenv("VECTOR_INDEX_MAX_VECTORS", "200000"))
+        
+        # Responses are embedded and inserted in write-behind batches off the request path
+        self.write_batcher = WriteBehindBatcher(
+            self.apply_writes,
+            max_batch=int(os.getenv("VECTOR_WRITE_BATCH_SIZE", "64")),
+            max_delay=float(os.getenv("VECTOR_WRITE_BATCH_DELAY_MS", "5")) / 1000
+        )
     
     async def initialize(self):
         """Initialize vector database connection"""
@@ -23,8 +94,20 @@ class VectorDBService:
             # In production, initialize Pinecone here
             pass
         
+        if self.data_dir:
+            os.makedirs(self.data_dir, exist_ok=True)
+            await asyncio.to_thread(self.map_segments)
+        
+        if self.index_path:
+            # Older versions saved a path without the suffix as "<path>.npz"
+            for path in (self.index_path, f"{self.index_path}.npz"):
+                if os.path.exists(path):
+                    self.global_index = await asyncio.to_thread(IVFFlatIndex.load, path, **self.index_params)
+                    break
+        
         # Load default rubrics
         await self.load_default_rubrics()
+        self.retention_task = asyncio.create_task(self.run_retention())
         self.initialized = True
     
     async def load_default_rubrics(self):
@@ -115,124 +198,268 @@ class VectorDBService:
             }
         }
         
-        self.rubrics = default_rubrics
-    
-    async def store_candidate_response(self, session_id: str, response_data: Dict[str, Any]) -> bool:
-        """Store candidate response as vector embedding"""
-        
-        try:
-            # In production, convert text to embeddings using OpenAI or similar
-            # For now, simulate storage
-            
-            if session_id not in self.vectors:
-                self.vectors[session_id] = []
-            
-            # Simulate vector embedding (in production, use actual embedding model)
-            text_content = response_data.get("content", "")
-            simulated_vector = self.simulate_text_embedding(text_content)
-            
-            vector_data = {
-                "id": f"{session_id}_{len(self.vectors[session_id])}",
-                "vector": simulated_vector,
-                "metadata": {
-                    "session_id": session_id,
-                    "timestamp": response_data.get("timestamp"),
-                    "type": response_data.get("type"),
-                    "content": text_content[:500],  # Store first 500 chars
-                    "agent": response_data.get("agent")
-                }
+        self.rubric_registry.set_defaults(default_rubrics)
+        await asyncio.to_thread(self.rubric_registry.reload)
+        self.rubric_registry.start()
+    
+    async def store_candidate_response(self, session_id: str, response_data: Dict[str, Any], durable: bool = False) -> bool:
+        """Queue a candidate response for embedding; durable=True waits until it is stored"""
+        
+        future = self.write_batcher.submit(session_id, response_data)
+        if durable:
+            return await future
+        return True
+    
+    async def store_candidate_responses(self, session_id: str, responses: List[Dict[str, Any]]) -> int:
+        """Store several responses (e.g. transcript chunks) and wait until they are stored"""
+        
+        futures = [self.write_batcher.submit(session_id, response_data) for response_data in responses]
+        results = await asyncio.gather(*futures) if futures else []
+        return sum(1 for stored in results if stored)
+    
+    async def flush_writes(self, session_id: Optional[str] = None) -> bool:
+        """Wait until queued responses (of one session, or all) are stored"""
+        return await self.write_batcher.flush(session_id)
+    
+    async def apply_writes(self, writes: List[tuple]):
+        """Embed a batch of (session_id, response) writes in one call, then insert them in order"""
+        
+        contents = [response_data.get("content", "") for _, response_data in writes]
+        # Embedding is the expensive part; keep it off the event loop
+        embeddings = await asyncio.to_thread(self.embed_many, contents)
+        
+        for (session_id, response_data), text_content, vector in zip(writes, contents, embeddings):
+            store = self.get_session_store(session_id, create=True)
+            metadata = {
+                "session_id": session_id,
+                "timestamp": response_data.get("timestamp"),
+                "type": response_data.get("type"),
+                "content": text_content[:500],  # Store first 500 chars
+                "agent": response_data.get("agent"),
+                "role": response_data.get("role"),
+                "rubric_id": response_data.get("rubric_id")
             }
-            
-            self.vectors[session_id].append(vector_data)
-            return True
-            
-        except Exception as e:
-            print(f"Error storing vector: {e}")
-            return False
+            vector_id = store.add(vector, metadata)
+            self.index_globally(vector_id, vector, metadata)
+        
+        # One buffered append per touched segment, off the event loop
+        stores = [self.vectors[session_id] for session_id in {session_id for session_id, _ in writes} if session_id in self.vectors]
+        await asyncio.to_thread(self.flush_segments, stores)
+        
+        for session_id in {session_id for session_id, _ in writes}:
+            self.get_lexical_index(session_id)
+    
+    def flush_segments(self, stores: List[SessionVectorStore]):
+        for store in stores:
+            store.flush_segment()
     
     async def query_similar_responses(self, session_id: str, query_text: str, top_k: int = 5) -> List[Dict[str, Any]]:
         """Query for similar responses"""
         
+        await self.flush_writes(session_id)
         if session_id not in self.vectors:
             return []
         
-        # Simulate similarity search
-        query_vector = self.simulate_text_embedding(query_text)
-        session_vectors = self.vectors[session_id]
+        # One matrix-vector product over the session, then a partial top-k
+        store = self.get_session_store(session_id)
+        indices, scores = store.query(self.embed_text(query_text), top_k)
+        
+        return [store.item(int(i), score) for i, score in zip(indices, scores)]
+    
+    async def query_hybrid_responses(self, session_id: str, query_text: str, top_k: int = 5, alpha: float = 0.5) -> List[Dict[str, Any]]:
+        """Query a session with BM25 and vector similarity fused.
+        
+        alpha weighs the vector score against the BM25 score (normalized to the best match);
+        alpha=0 is purely lexical and only touches the query terms' posting lists.
+        """
+        
+        await self.flush_writes(session_id)
+        store = self.get_session_store(session_id)
+        if store is None or top_k <= 0:
+            return []
         
-        # Calculate cosine similarity (simulated)
-        similarities = []
-        for vector_data in session_vectors:
-            similarity = self.cosine_similarity(query_vector, vector_data["vector"])
-            similarities.append({
-                "similarity": similarity,
-                "data": vector_data
-            })
+        lexical = self.get_lexical_index(session_id)
+        matched_rows, matched_scores = lexical.scores(query_text)
         
-        # Sort by similarity and return top_k
-        similarities.sort(key=lambda x: x["similarity"], reverse=True)
-        return [item["data"] for item in similarities[:top_k]]
+        # Candidates: the best lexical matches plus the nearest vectors
+        pool = max(top_k * 4, 20)
+        if len(matched_rows) > pool:
+            matched_top = matched_rows[np.argpartition(-matched_scores, pool - 1)[:pool]]
+        else:
+            matched_top = matched_rows
+        candidates = matched_top
+        if alpha > 0:
+            query_vector = self.embed_text(query_text)
+            vector_rows, _ = store.query(query_vector, pool)
+            candidates = np.union1d(matched_top, vector_rows)
+        if len(candidates) == 0:
+            return []
+        
+        lexical_scores = np.zeros(len(candidates))
+        if len(matched_rows):
+            positions = np.searchsorted(matched_rows, candidates)
+            hit = (positions < len(matched_rows)) & (matched_rows[np.minimum(positions, len(matched_rows) - 1)] == candidates)
+            lexical_scores[hit] = matched_scores[positions[hit]] / matched_scores.max()
+        vector_scores = store.matrix[candidates] @ query_vector if alpha > 0 else np.zeros(len(candidates))
+        scores = alpha * vector_scores + (1 - alpha) * lexical_scores
+        
+        k = min(top_k, len(candidates))
+        best = np.argsort(-scores, kind="stable")[:k]
+        results = []
+        for i in best:
+            item = store.item(int(candidates[i]), scores[i])
+            item["vector_score"] = float(vector_scores[i])
+            item["lexical_score"] = float(lexical_scores[i])
+            results.append(item)
+        return results
     
-    async def get_rubric(self, rubric_id: str) -> Optional[Dict[str, Any]]:
-        """Get interview rubric by ID"""
-        return self.rubrics.get(rubric_id)
+    def get_lexical_index(self, session_id: str) -> InvertedIndex:
+        """Session's BM25 index, caught up with anything stored (or mapped from disk) since last use"""
+        lexical = self.lexical_indexes.get(session_id)
+        if lexical is None:
+            lexical = self.lexical_indexes[session_id] = InvertedIndex()
+        lexical.sync(self.vectors[session_id].contents())
+        return lexical
     
-    async def calculate_competency_scores(self, session_id: str, rubric_id: str) -> Dict[str, float]:
-        """Calculate competency scores based on rubric"""
-        
-        rubric = await self.get_rubric(rubric_id)
-        if not rubric:
-            return {}
+    def map_segments(self):
+        """Map every session segment found in the data directory (no vectors are read)"""
+        for name in os.listdir(self.data_dir):
+            if name.endswith(".f32"):
+                session_id = unquote(name[:-len(".f32")])
+                self.vectors[session_id] = SessionVectorStore.open_segment(
+                    session_id, self.segment_path(session_id), self.dimension
+                )
+    
+    def segment_path(self, session_id: str) -> Optional[str]:
+        if not self.data_dir:
+            return None
+        return os.path.join(self.data_dir, quote(session_id, safe=""))
+    
+    def get_session_store(self, session_id: str, create: bool = False) -> Optional[SessionVectorStore]:
+        """Session store, marked most recently used; colder sessions are paged out past the hot limit"""
+        store = self.vectors.get(session_id)
+        if store is None:
+            if not create:
+                return None
+            store = self.vectors[session_id] = SessionVectorStore(
+                session_id, self.dimension, segment_path=self.segment_path(session_id)
+            )
         
-        if session_id not in self.vectors:
-            return {}
-        
-        session_vectors = self.vectors[session_id]
-        competency_scores = {}
-        
-        for competency, config in rubric["competencies"].items():
-            keywords = config["keywords"]
-            weight = config["weight"]
-            
-            # Calculate score based on keyword presence and context
-            total_score = 0
-            total_responses = len(session_vectors)
-            
-            for vector_data in session_vectors:
-                content = vector_data["metadata"]["content"].lower()
-                keyword_matches = sum(1 for keyword in keywords if keyword in content)
-                keyword_score = min(keyword_matches / len(keywords), 1.0)
-                
-                # Simulate context understanding (in production, use semantic similarity)
-                context_score = np.random.uniform(0.6, 1.0)  # Simulate good context understanding
-                
-                response_score = (keyword_score * 0.6 + context_score * 0.4) * 100
-                total_score += response_score
-            
-            avg_score = total_score / total_responses if total_responses > 0 else 0
-            competency_scores[competency] = min(avg_score, 100)
-        
-        return competency_scores
+        self.session_access[session_id] = time.monotonic()
+        self.session_access.move_to_end(session_id)
+        if self.data_dir:
+            self.hot_sessions[session_id] = None
+            self.hot_sessions.move_to_end(session_id)
+            while len(self.hot_sessions) > self.max_hot_sessions:
+                cold_id, _ = self.hot_sessions.popitem(last=False)
+                if cold_id in self.vectors:
+                    self.vectors[cold_id].page_out()
+        return store
     
-    def simulate_text_embedding(self, text: str) -> List[float]:
-        """Simulate text embedding (in production, use OpenAI embeddings)"""
-        # Create a simple hash-based embedding simulation
-        import hashlib
+    def load_vectors(self, vector_ids: List[str]):
+        """Full-precision vectors for ids like "<session_id>_<row>", read from the session stores"""
+        vectors = np.zeros((len(vector_ids), self.dimension), dtype=np.float32)
+        found = np.zeros(len(vector_ids), dtype=bool)
+        for position, vector_id in enumerate(vector_ids):
+            session_id, _, row = vector_id.rpartition("_")
+            store = self.vectors.get(session_id)
+            if store is not None and row.isdigit() and int(row) < len(store):
+                vectors[position] = store.matrix[int(row)]
+                found[position] = True
+        return vectors, found
+    
+    def index_globally(self, vector_id: str, vector, metadata: Dict[str, Any]):
+        """Add a response to the cross-session index, retraining in the background as it grows"""
+        self.global_index.add(vector_id, vector, metadata)
+        if self.index_max_vectors and len(self.global_index) > self.index_max_vectors:
+            # Trim a tenth below the cap so the compaction is not repeated on every insert
+            dropped = self.global_index.remove_oldest(len(self.global_index) - int(self.index_max_vectors * 0.9))
+            self.retention_counters["index_rows_evicted"] += dropped
+        if self.global_index.needs_training():
+            task = asyncio.create_task(self.global_index.train_async())
+            self.background_tasks.add(task)
+            task.add_done_callback(self.background_tasks.discard)
+    
+    async def query_global_responses(self, query_text: str, top_k: int = 5, filters: Optional[Dict[str, Any]] = None,
+                                     nprobe: Optional[int] = None, exclude_session_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Query similar responses across every session (calibration, copy detection).
         
-        hash_obj = hashlib.md5(text.encode())
-        hash_hex = hash_obj.hexdigest()
+        filters may match role, rubric_id, agent or session_id exactly.
+        """
+        matches = self.global_index.search(
+            self.embed_text(query_text), top_k,
+            filters=filters, nprobe=nprobe, exclude_session_id=exclude_session_id
+        )
+        return [self.global_index.record(row, score) for row, score in matches]
+    
+    async def save_global_index(self, path: Optional[str] = None):
+        """Persist the cross-session index (see VECTOR_INDEX_PATH)"""
+        path = path or self.index_path
+        if path:
+            await asyncio.to_thread(self.global_index.save, path)
+    
+    async def get_rubric(self, rubric_id: str) -> Optional[Dict[str, Any]]:
+        """Get interview rubric by ID"""
+        plan = self.rubric_registry.get(rubric_id)
+        return plan.as_dict() if plan else None
+    
+    def get_rubric_plan(self, rubric_id: str) -> Optional[RubricPlan]:
+        """Precompiled scoring plan for a rubric"""
+        return self.rubric_registry.get(rubric_id)
+    
+    async def calculate_competency_scores(self, session_id: str, plan: Union[RubricPlan, str]) -> Dict[str, float]:
+        """Competency scores of a session under a precompiled plan (see get_rubric_plan).
         
-        # Convert to 384-dimensional vector (simulating sentence-transformers)
-        vector = []
-        for i in range(0, len(hash_hex), 2):
-            val = int(hash_hex[i:i+2], 16) / 255.0  # Normalize to 0-1
-            vector.append(val)
+        A rubric id is still accepted and resolved once, for older callers.
+        """
+        if isinstance(plan, str):
+            plan = self.get_rubric_plan(plan)
+        tally = await self.competency_tally(session_id, plan) if plan else None
+        return tally.scores() if tally else {}
+    
+    async def evaluate_competencies(self, session_id: str, plan: RubricPlan, level: Optional[str] = None) -> Dict[str, Any]:
+        """Competency scores with the plan's weighted overall score and, for a level, the gap to its benchmarks"""
+        tally = await self.competency_tally(session_id, plan)
+        scores = tally.score_array() if tally else np.zeros(len(plan.competencies))
+        evaluation = {
+            "rubric_id": plan.rubric_id,
+            "competencies": dict(zip(plan.competencies, scores.tolist())),
+            "overall": plan.overall_score(scores)
+        }
+        if level is not None:
+            evaluation["benchmark_gaps"] = plan.benchmark_gaps(scores, level)
+        return evaluation
+    
+    async def competency_tally(self, session_id: str, plan: RubricPlan) -> Optional[CompetencyTally]:
+        """The session's running tally under plan, caught up with everything it has said"""
+        # Score everything the session has said so far, including queued writes
+        await self.flush_writes(session_id)
+        if session_id not in self.vectors:
+            return None
         
-        # Pad to 384 dimensions
-        while len(vector) < 384:
-            vector.append(np.random.uniform(-0.1, 0.1))
+        tallies = self.competency_tallies.setdefault(session_id, {})
+        tally = tallies.get(plan.rubric_id)
+        if tally is None or tally.rubric is not plan.matcher:
+            # New session, or the rubric was reloaded: rescore against the current plan
+            tally = tallies[plan.rubric_id] = CompetencyTally(plan.matcher)
         
-        return vector[:384]
+        # Only responses stored since the last call are matched
+        tally.update(self.get_session_store(session_id).contents())
+        return tally
+    
+    def embed_text(self, text: str) -> np.ndarray:
+        """Embed one text as a float32 vector"""
+        return self.embedder.embed(text)
+    
+    def embed_many(self, texts: List[str]) -> np.ndarray:
+        """Embed many texts in one vectorized batch, one row per text"""
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        return self.embedder.embed_many(texts)
+    
+    def simulate_text_embedding(self, text: str) -> List[float]:
+        """Text embedding as a plain list (kept for existing callers)"""
+        return self.embed_text(text).tolist()
     
     def cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
         """Calculate cosine similarity between two vectors"""
@@ -248,6 +475,136 @@ class VectorDBService:
         
         return dot_product / (norm1 * norm2)
     
+    async def complete_session(self, session_id: str):
+        """Start the retention clock for a finished interview"""
+        self.completed_sessions[session_id] = time.monotonic()
+        await self.enforce_retention()
+    
+    async def drop_session(self, session_id: str, delete_segment: bool = True) -> bool:
+        """Forget a session's vectors, indexes and scores (and by default its on-disk segment).
+        
+        Rows already in the cross-session index stay there for calibration until
+        the index cap or the memory budget ages them out.
+        """
+        await self.flush_writes(session_id)
+        store = self.vectors.pop(session_id, None)
+        self.forget_session_state(session_id)
+        self.completed_sessions.pop(session_id, None)
+        if store is None:
+            return False
+        if delete_segment:
+            store.delete_segment()
+        self.retention_counters["dropped"] += 1
+        return True
+    
+    async def archive_session(self, session_id: str) -> bool:
+        """Release a session's memory, keeping it queryable from its on-disk segment.
+        
+        Needs VECTOR_DATA_DIR; without it the session is left in memory and False is returned.
+        """
+        await self.flush_writes(session_id)
+        store = self.vectors.get(session_id)
+        if store is None or not store.segment_path:
+            return False
+        store.page_out()
+        self.forget_session_state(session_id)
+        self.retention_counters["archived"] += 1
+        return True
+    
+    def forget_session_state(self, session_id: str):
+        """Drop derived in-memory state; indexes and tallies rebuild from the segment if needed"""
+        self.lexical_indexes.pop(session_id, None)
+        self.competency_tallies.pop(session_id, None)
+        self.hot_sessions.pop(session_id, None)
+        self.session_access.pop(session_id, None)
+    
+    async def release_session(self, session_id: str) -> bool:
+        """Archive when a data directory is configured, otherwise drop"""
+        if self.data_dir:
+            return await self.archive_session(session_id)
+        return await self.drop_session(session_id)
+    
+    async def enforce_retention(self):
+        """Expire completed sessions past their TTL, then evict LRU sessions down to the memory
+        budget, and the oldest cross-session index rows if that is not enough
+        """
+        now = time.monotonic()
+        for session_id, completed_at in list(self.completed_sessions.items()):
+            if now - completed_at >= self.session_ttl:
+                self.completed_sessions.pop(session_id, None)
+                if await self.release_session(session_id):
+                    self.retention_counters["expired"] += 1
+        
+        if self.memory_budget <= 0:
+            return
+        resident = self.resident_bytes()
+        for session_id in list(self.session_access):
+            if resident <= self.memory_budget:
+                break
+            # Sessions without a segment can only be dropped once the interview is over
+            if not self.data_dir and session_id not in self.completed_sessions:
+                continue
+            before = self.session_bytes(session_id)
+            if before and await self.release_session(session_id):
+                self.retention_counters["evicted"] += 1
+                resident -= before - self.session_bytes(session_id)
+        
+        index_count = len(self.global_index)
+        if resident > self.memory_budget and index_count:
+            row_bytes = self.global_index.nbytes() / index_count
+            excess_rows = int((resident - self.memory_budget) / row_bytes) + 1
+            self.retention_counters["index_rows_evicted"] += self.global_index.remove_oldest(excess_rows)
+    
+    async def run_retention(self):
+        while True:
+            await asyncio.sleep(self.retention_interval)
+            try:
+                await self.enforce_retention()
+            except Exception as e:
+                print(f"Error enforcing vector retention: {e}")
+    
+    def session_bytes(self, session_id: str) -> int:
+        store = self.vectors.get(session_id)
+        lexical = self.lexical_indexes.get(session_id)
+        return (store.nbytes() if store else 0) + (lexical.nbytes() if lexical else 0)
+    
+    def resident_bytes(self) -> int:
+        return sum(self.session_bytes(session_id) for session_id in self.vectors) + self.global_index.nbytes()
+    
+    def memory_report(self) -> Dict[str, Any]:
+        """Per-session and total memory held by vector data"""
+        now = time.monotonic()
+        sessions = {}
+        for session_id, store in self.vectors.items():
+            completed_at = self.completed_sessions.get(session_id)
+            sessions[session_id] = {
+                "rows": len(store),
+                "resident": store.hot,
+                "bytes": self.session_bytes(session_id),
+                "completed_seconds_ago": round(now - completed_at, 1) if completed_at is not None else None
+            }
+        
+        return {
+            "sessions": sessions,
+            "session_bytes": sum(s["bytes"] for s in sessions.values()),
+            "global_index_rows": len(self.global_index),
+            "global_index_bytes": self.global_index.nbytes(),
+            "global_index_max_rows": self.index_max_vectors,
+            "memory_budget": self.memory_budget,
+            "session_ttl": self.session_ttl,
+            **self.retention_counters
+        }
+    
+    async def close(self):
+        """Store queued writes and persist the cross-session index on shutdown"""
+        if self.retention_task:
+            self.retention_task.cancel()
+        self.rubric_registry.stop()
+        await self.write_batcher.close()
+        for store in self.vectors.values():
+            store.close_segment()
+        await self.save_global_index()
+    
     async def health_check(self) -> bool:
         """Check if vector database is healthy"""
         return self.initialized
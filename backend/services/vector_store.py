@@ -0,0 +1,213 @@
+import json
+import os
+import threading
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+class SessionVectorStore:
+    """Contiguous, pre-normalized float32 vectors for one session with column-stored metadata"""
+    
+    METADATA_COLUMNS = ("session_id", "timestamp", "type", "content", "agent", "role", "rubric_id")
+    
+    def __init__(self, session_id: str, dimension: int = 384, initial_capacity: int = 16, segment_path: Optional[str] = None):
+        self.session_id = session_id
+        self.dimension = dimension
+        self.count = 0
+        
+        # Rows [0, count) are live; capacity doubles as the session grows
+        self.matrix = np.zeros((initial_capacity, dimension), dtype=np.float32)
+        self._columns: Optional[Dict[str, List[Any]]] = {name: [] for name in self.METADATA_COLUMNS}
+        self.content_bytes = 0  # running size of the loaded content column
+        
+        # With a segment path every row is also appended to <path>.f32 (raw float32)
+        # and <path>.jsonl (one metadata row per line), so the session survives restarts.
+        # Rows are buffered and written in one call per file by flush_segment(), which
+        # the service runs off the event loop; the files stay open between flushes.
+        self.segment_path = segment_path
+        self.pending_rows: List[Tuple[bytes, str]] = []
+        self.segment_files: Optional[Tuple[Any, Any]] = None
+        self.segment_lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    @classmethod
+    def open_segment(cls, session_id: str, segment_path: str, dimension: int = 384) -> "SessionVectorStore":
+        """Map an existing segment read-only; metadata is read on first use"""
+        store = cls(session_id, dimension, initial_capacity=0, segment_path=segment_path)
+        store._repair_segment()
+        store.page_out()
+        return store
+    
+    @property
+    def hot(self) -> bool:
+        return not isinstance(self.matrix, np.memmap)
+    
+    @property
+    def columns(self) -> Dict[str, List[Any]]:
+        if self._columns is None:
+            self._columns = self._read_metadata()
+            self.content_bytes = sum(len(c or "") for c in self._columns["content"])
+        return self._columns
+    
+    def add(self, vector: np.ndarray, metadata: Dict[str, Any]) -> str:
+        """Append a vector (normalized on the way in) and its metadata"""
+        if not self.hot:
+            self.page_in()
+        if self.count == self.matrix.shape[0]:
+            grown = np.zeros((max(self.matrix.shape[0] * 2, 16), self.dimension), dtype=np.float32)
+            grown[:self.count] = self.matrix[:self.count]
+            self.matrix = grown
+        
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        self.matrix[self.count] = vector / norm if norm > 0 else vector
+        
+        row = [metadata.get(name) for name in self.METADATA_COLUMNS]
+        for name, value in zip(self.METADATA_COLUMNS, row):
+            self.columns[name].append(value)
+        self.content_bytes += len(metadata.get("content") or "")
+        if self.segment_path:
+            with self.segment_lock:
+                self.pending_rows.append((self.matrix[self.count].tobytes(), json.dumps(row, default=str) + "\n"))
+        
+        vector_id = f"{self.session_id}_{self.count}"
+        self.count += 1
+        return vector_id
+    
+    def page_out(self):
+        """Swap the in-memory matrix for a read-only map of the segment and drop cached metadata"""
+        if not self.segment_path:
+            return
+        self.flush_segment()
+        self.close_segment()
+        vectors_path = f"{self.segment_path}.f32"
+        rows = os.path.getsize(vectors_path) // (4 * self.dimension) if os.path.exists(vectors_path) else 0
+        if rows == 0:
+            self.matrix = np.zeros((0, self.dimension), dtype=np.float32)
+        else:
+            self.matrix = np.memmap(vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dimension))
+        self.count = rows
+        self._columns = None
+        self.content_bytes = 0
+    
+    def page_in(self):
+        """Load a mapped segment back into a growable in-memory matrix"""
+        if self.hot:
+            return
+        matrix = np.zeros((max(self.count * 2, 16), self.dimension), dtype=np.float32)
+        matrix[:self.count] = self.matrix[:self.count]
+        self.matrix = matrix
+    
+    def delete_segment(self):
+        """Remove the on-disk segment files"""
+        if not self.segment_path:
+            return
+        with self.segment_lock:
+            self.pending_rows = []
+        self.close_segment()
+        for suffix in (".f32", ".jsonl"):
+            if os.path.exists(self.segment_path + suffix):
+                os.remove(self.segment_path + suffix)
+    
+    def flush_segment(self):
+        """Append buffered rows to the segment files, one write per file"""
+        with self.segment_lock:
+            if not self.pending_rows:
+                return
+            rows, self.pending_rows = self.pending_rows, []
+            if self.segment_files is None:
+                self.segment_files = (
+                    open(f"{self.segment_path}.jsonl", "a", encoding="utf-8"),
+                    open(f"{self.segment_path}.f32", "ab")
+                )
+            metadata_file, vectors_file = self.segment_files
+            # A crash between the two writes leaves a torn row, which _repair_segment trims on open
+            metadata_file.write("".join(line for _, line in rows))
+            metadata_file.flush()
+            vectors_file.write(b"".join(vector for vector, _ in rows))
+            vectors_file.flush()
+    
+    def close_segment(self):
+        with self.segment_lock:
+            if self.segment_files is not None:
+                for f in self.segment_files:
+                    f.close()
+                self.segment_files = None
+    
+    def _repair_segment(self):
+        """Trim a segment torn by a crash mid-append so both files hold the same rows"""
+        vectors_path, metadata_path = f"{self.segment_path}.f32", f"{self.segment_path}.jsonl"
+        row_bytes = 4 * self.dimension
+        rows = os.path.getsize(vectors_path) // row_bytes if os.path.exists(vectors_path) else 0
+        
+        lines, complete_bytes = 0, 0
+        if os.path.exists(metadata_path):
+            with open(metadata_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n") or lines == rows:
+                        break
+                    lines += 1
+                    complete_bytes += len(line)
+            if complete_bytes != os.path.getsize(metadata_path):
+                os.truncate(metadata_path, complete_bytes)
+        
+        if os.path.exists(vectors_path) and os.path.getsize(vectors_path) != lines * row_bytes:
+            os.truncate(vectors_path, lines * row_bytes)
+    
+    def _read_metadata(self) -> Dict[str, List[Any]]:
+        columns: Dict[str, List[Any]] = {name: [] for name in self.METADATA_COLUMNS}
+        path = f"{self.segment_path}.jsonl" if self.segment_path else None
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line, _ in zip(f, range(self.count)):
+                    row = json.loads(line)
+                    for name, value in zip(self.METADATA_COLUMNS, row):
+                        columns[name].append(value)
+        return columns
+    
+    def query(self, vector: np.ndarray, top_k: int = 5) -> Tuple[np.ndarray, np.ndarray]:
+        """Row indices and cosine similarities of the top_k closest vectors, best first"""
+        if self.count == 0 or top_k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        
+        scores = self.matrix[:self.count] @ (query / norm)
+        
+        k = min(top_k, self.count)
+        if k < self.count:
+            indices = np.argpartition(-scores, k - 1)[:k]
+        else:
+            indices = np.arange(self.count)
+        indices = indices[np.argsort(-scores[indices], kind="stable")]
+        return indices, scores[indices]
+    
+    def metadata(self, index: int) -> Dict[str, Any]:
+        return {name: self.columns[name][index] for name in self.METADATA_COLUMNS}
+    
+    def item(self, index: int, similarity: Optional[float] = None) -> Dict[str, Any]:
+        """Row as the {"id", "vector", "metadata"} record the service has always returned"""
+        item = {
+            "id": f"{self.session_id}_{index}",
+            "vector": self.matrix[index].tolist(),
+            "metadata": self.metadata(index)
+        }
+        if similarity is not None:
+            item["similarity"] = float(similarity)
+        return item
+    
+    def contents(self) -> List[str]:
+        return self.columns["content"]
+    
+    def nbytes(self) -> int:
+        """Approximate memory held by the matrix and metadata"""
+        metadata_bytes = 0
+        if self._columns is not None:
+            metadata_bytes = self.content_bytes + 64 * self.count * len(self.METADATA_COLUMNS)
+        # Mapped pages belong to the page cache, not to this process
+        matrix_bytes = self.matrix.nbytes if self.hot else 0
+        return matrix_bytes + metadata_bytes
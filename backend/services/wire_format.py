@@ -0,0 +1,98 @@
+import datetime
+import json
+import os
+import numpy as np
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Falls back to the standard library encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # MessagePack is only offered when installed
+    msgpack = None
+
+# Clients select a codec by offering the WebSocket subprotocol "interview.<name>"
+SUBPROTOCOL_PREFIX = "interview."
+
+Frame = Union[str, bytes]
+
+# Agent payloads may carry numpy scalars and int keys, which json.dumps accepted
+_ORJSON_OPTIONS = (orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS) if orjson else 0
+
+def _plain(obj: Any) -> Any:
+    """Values the fast encoders do not handle natively"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, (np.generic, np.ndarray)):
+        return obj.tolist()
+    raise TypeError(f"Cannot serialize {type(obj).__name__}")
+
+class JSONCodec:
+    """Text frames; orjson when available"""
+    
+    name = "json"
+    binary = False
+    
+    def encode(self, frame: Any, request_id: Optional[Any] = None) -> str:
+        if isinstance(frame, BaseModel):
+            # pydantic writes the JSON itself, without building a dict first
+            body = frame.model_dump_json()
+            if request_id is None:
+                return body
+            rest = "," + body[1:] if body != "{}" else "}"
+            return '{"request_id":' + self._dumps(request_id) + rest
+        if request_id is not None:
+            frame = {"request_id": request_id, **frame}
+        return self._dumps(frame)
+    
+    def decode(self, data: Frame) -> Dict[str, Any]:
+        return orjson.loads(data) if orjson else json.loads(data)
+    
+    def _dumps(self, value: Any) -> str:
+        if orjson:
+            return orjson.dumps(value, default=_plain, option=_ORJSON_OPTIONS).decode()
+        return json.dumps(value, default=_plain, separators=(",", ":"))
+
+class MessagePackCodec:
+    """Binary frames; text frames from the same client are still read as JSON"""
+    
+    name = "msgpack"
+    binary = True
+    
+    def encode(self, frame: Any, request_id: Optional[Any] = None) -> bytes:
+        if isinstance(frame, BaseModel):
+            frame = frame.model_dump()
+        if request_id is not None:
+            frame = {"request_id": request_id, **frame}
+        return msgpack.packb(frame, default=_plain, use_bin_type=True)
+    
+    def decode(self, data: Frame) -> Dict[str, Any]:
+        if isinstance(data, str):
+            return JSON.decode(data)
+        return msgpack.unpackb(data, raw=False)
+
+JSON = JSONCodec()
+
+CODECS = {"json": JSON}
+if msgpack is not None:
+    CODECS["msgpack"] = MessagePackCodec()
+
+def negotiate(subprotocols: Iterable[str], requested: Optional[str] = None) -> Tuple[Any, Optional[str]]:
+    """Pick a codec from the client's offered subprotocols ("interview.msgpack",
+    "interview.json") or a ?format= query value.
+    
+    Returns the codec and the subprotocol to accept (None when the client
+    offered none). Clients that ask for nothing get JSON as before.
+    """
+    for subprotocol in subprotocols:
+        if subprotocol.startswith(SUBPROTOCOL_PREFIX):
+            codec = CODECS.get(subprotocol[len(SUBPROTOCOL_PREFIX):])
+            if codec:
+                return codec, subprotocol
+    return CODECS.get(requested or os.getenv("WS_DEFAULT_FORMAT", "json"), JSON), None
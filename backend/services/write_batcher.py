@@ -0,0 +1,113 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+class WriteBehindBatcher:
+    """Collects writes for a few milliseconds (or up to max_batch items) and applies them as one batch.
+    
+    submit() returns at once with a future that resolves to True once the write
+    is applied (False if the batch failed); flush() waits for everything pending
+    under a key, for callers that need to read their own writes.
+    """
+    
+    def __init__(self, apply_batch: Callable[[List[Tuple[str, Any]]], Awaitable[None]],
+                 max_batch: int = 64, max_delay: float = 0.005):
+        self.apply_batch = apply_batch
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        
+        self.pending: List[Tuple[str, Any, asyncio.Future]] = []
+        # key -> futures of writes not yet applied, queued or in the running batch
+        self.unapplied: Dict[str, Set[asyncio.Future]] = {}
+        
+        self.arrived: Optional[asyncio.Event] = None
+        self.urgent: Optional[asyncio.Event] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.counters = {"submitted": 0, "applied": 0, "failed": 0, "batches": 0}
+    
+    def submit(self, key: str, item: Any) -> asyncio.Future:
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((key, item, future))
+        self.unapplied.setdefault(key, set()).add(future)
+        future.add_done_callback(lambda f: self._forget(key, f))
+        self.counters["submitted"] += 1
+        
+        self.arrived.set()
+        if len(self.pending) >= self.max_batch:
+            self.urgent.set()
+        return future
+    
+    async def flush(self, key: Optional[str] = None) -> bool:
+        """Apply pending writes now and wait for them (all keys when key is None)"""
+        if key is None:
+            futures = set().union(*self.unapplied.values())
+        else:
+            futures = set(self.unapplied.get(key, ()))
+        if not futures:
+            return True
+        
+        self.urgent.set()
+        # wait() rather than gather(): a cancelled flush must not cancel the writes
+        await asyncio.wait(futures)
+        return all(not f.cancelled() and f.result() for f in futures)
+    
+    async def close(self):
+        await self.flush()
+        if self.worker:
+            self.worker.cancel()
+            self.worker = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self.counters,
+            "pending": len(self.pending),
+            "unapplied": sum(len(futures) for futures in self.unapplied.values())
+        }
+    
+    def _ensure_worker(self):
+        if self.worker is None or self.worker.done():
+            self.arrived = asyncio.Event()
+            self.urgent = asyncio.Event()
+            if self.pending:
+                self.arrived.set()
+            self.worker = asyncio.create_task(self._run())
+    
+    def _forget(self, key: str, future: asyncio.Future):
+        futures = self.unapplied.get(key)
+        if futures is not None:
+            futures.discard(future)
+            if not futures:
+                del self.unapplied[key]
+    
+    async def _run(self):
+        while True:
+            await self.arrived.wait()
+            if len(self.pending) < self.max_batch and not self.urgent.is_set():
+                # Give the batch a few milliseconds to fill
+                try:
+                    await asyncio.wait_for(self.urgent.wait(), self.max_delay)
+                except asyncio.TimeoutError:
+                    pass
+            
+            batch = self.pending[:self.max_batch]
+            del self.pending[:self.max_batch]
+            if not self.pending:
+                self.arrived.clear()
+                self.urgent.clear()
+            
+            await self._apply(batch)
+    
+    async def _apply(self, batch: List[Tuple[str, Any, asyncio.Future]]):
+        self.counters["batches"] += 1
+        try:
+            await self.apply_batch([(key, item) for key, item, _ in batch])
+            applied = True
+            self.counters["applied"] += len(batch)
+        except Exception as e:
+            print(f"Error applying write batch: {e}")
+            applied = False
+            self.counters["failed"] += len(batch)
+        
+        for _, _, future in batch:
+            if not future.done():
+                future.set_result(applied)
@@ -0,0 +1,76 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services.ann_index import IVFFlatIndex
+from backend.services.embeddings import HashingEmbedder
+
+WORDS = (
+    "api database cache latency queue index shard replica consistency throughput "
+    "react component state render hook css layout accessibility design user "
+    "team conflict mentor deadline feedback ownership learning communicate explain "
+    "algorithm graph tree heap sort complexity recursion dynamic programming memory"
+).split()
+
+def synthetic_responses(count: int, rng: np.random.Generator):
+    """Candidate-answer-like texts drawn from a small interview vocabulary"""
+    for _ in range(count):
+        length = rng.integers(8, 40)
+        yield " ".join(rng.choice(WORDS, length))
+
+def benchmark(args):
+    rng = np.random.default_rng(args.seed)
+    embedder = HashingEmbedder(args.dimension)
+    
+    print(f"Embedding {args.vectors} responses and {args.queries} queries...")
+    vectors = embedder.embed_many(list(synthetic_responses(args.vectors, rng)))
+    queries = embedder.embed_many(list(synthetic_responses(args.queries, rng)))
+    ids = [f"bench_{row}" for row in range(args.vectors)]
+    
+    # Exact top_k by brute force is the recall reference
+    truth = np.argsort(-(queries @ vectors.T), axis=1)[:, :args.top_k]
+    
+    def load_vectors(vector_ids):
+        rows = [int(vector_id.rpartition("_")[2]) for vector_id in vector_ids]
+        return vectors[rows], np.ones(len(rows), dtype=bool)
+    
+    print(f"{'quantization':<14}{'re-rank':<10}{'vector MB':>10}{'recall@' + str(args.top_k):>11}{'ms/query':>10}")
+    for mode in ("none", "float16", "int8"):
+        for rerank in ((False,) if mode == "none" else (False, True)):
+            index = IVFFlatIndex(
+                args.dimension, nprobe=args.nprobe, quantization=mode, rerank_factor=args.rerank_factor,
+                vector_loader=load_vectors if rerank else None
+            )
+            for row, vector in enumerate(vectors):
+                index.add(ids[row], vector, {})
+            index.train()
+            
+            start = time.perf_counter()
+            results = [index.search(query, args.top_k) for query in queries]
+            elapsed = (time.perf_counter() - start) / len(queries) * 1000
+            
+            recall = np.mean([
+                len(set(truth[q]) & {row for row, _ in results[q]}) / args.top_k
+                for q in range(len(queries))
+            ])
+            megabytes = index.stats()["vector_bytes"] / 1024 / 1024
+            print(f"{mode:<14}{'yes' if rerank else 'no':<10}{megabytes:>10.1f}{recall:>11.3f}{elapsed:>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall and memory of the cross-session index per quantization mode")
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, default=8)
+    parser.add_argument("--rerank-factor", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    benchmark(parser.parse_args())
+
+if __name__ == "__main__":
+    main()
@@ -14,10 +14,13 @@ def install_requirements():
         "python-dotenv==1.0.0",
         "pydantic==2.5.0",
         "websockets==12.0",
+        "aiohttp==3.9.1",
         "numpy==1.24.3",
         "scikit-learn==1.3.0",
         "textblob==0.17.1",
-        "asyncio-mqtt==0.13.0"
+        "asyncio-mqtt==0.13.0",
+        "orjson==3.9.10",
+        "msgpack==1.0.7"
     ]
     
     for package in requirements:
@@ -35,7 +38,59 @@ ANTHROPIC_API_KEY=your_anthropic_api_key_here
 
 # Judge0 Configuration
 JUDGE0_API_URL=https://judge0-ce.p.rapidapi.com
+# Comma-separated list of instances for routing, hedging and circuit breaking
+JUDGE0_API_URLS=
 JUDGE0_API_KEY=your_rapidapi_key_here
+# judge0, local (sandboxed subprocesses) or simulated
+EXECUTION_BACKEND=judge0
+LOCAL_EXECUTOR_WORKERS=4
+LOCAL_EXECUTOR_MAX_PROCESSES=256
+LOCAL_EXECUTOR_COMPILE_MEMORY_KB=1048576
+# The local backend is not a security boundary: submissions run as the server user and can
+# read its files (.env included) unless the server runs as root with a dedicated, unprivileged
+# LOCAL_EXECUTOR_USER that cannot read them
+LOCAL_EXECUTOR_USER=
+# Compiled-artifact directory writable only by the server; defaults to a per-user dir under the system temp dir
+EXECUTION_ARTIFACT_DIR=
+EXECUTION_MAX_CONCURRENT_CASES=32
+EXECUTION_MAX_QUEUED_PER_SESSION=4
+# Final submissions per session that run at submission priority
+CODING_MAX_FINAL_SUBMISSIONS=3
+# exact, whitespace, token or float
+OUTPUT_COMPARATOR=exact
+# false skips downloading stdout for exact-only runs (results then have an empty "output")
+JUDGE0_FETCH_OUTPUT=true
+JUDGE0_SUBMISSION_MODE=batch
+JUDGE0_MAX_CONCURRENCY=10
+JUDGE0_POOL_LIMIT_PER_HOST=30
+# Public URL of /api/judge0/callback (leave empty to poll); in multi-worker mode
+# each worker appends /<shard> so the router delivers results to the submitter
+JUDGE0_CALLBACK_URL=
+
+# Code execution result cache (leave EXECUTION_CACHE_DIR empty for memory only)
+EXECUTION_CACHE_MAX_BYTES=67108864
+EXECUTION_CACHE_DIR=
+
+# Interview sessions: memory, sqlite or redis (redis falls back to an in-process stand-in without REDIS_URL)
+SESSION_STORE=memory
+SESSION_DB_PATH=sessions.db
+REDIS_URL=
+SESSION_MAX_IN_MEMORY=1000
+SESSION_IDLE_TTL=1800
+SESSION_COMPLETED_TTL=300
+
+# WebSocket messages with a request_id run concurrently (in order per agent)
+WS_MAX_CONCURRENCY=4
+WS_MAX_QUEUED=32
+# Seconds running messages may take to finish after the client disconnects
+WS_CLOSE_TIMEOUT=30
+# WebSocket wire format when the client does not negotiate one (json or msgpack)
+WS_DEFAULT_FORMAT=json
+WS_PER_MESSAGE_DEFLATE=true
+
+# Multi-worker mode (set by scripts/start_cluster.py; leave empty for a single worker)
+WORKER_URLS=
+WORKER_SHARD=0
 
 # LiveKit Configuration
 LIVEKIT_API_KEY=your_livekit_api_key_here
@@ -45,6 +100,32 @@ LIVEKIT_WS_URL=wss://your-livekit-server.com
 # Vector Database (Pinecone)
 PINECONE_API_KEY=your_pinecone_api_key_here
 PINECONE_ENVIRONMENT=your_pinecone_environment
+# Extra rubrics as JSON/YAML files, reloaded when they change
+RUBRIC_DIR=
+RUBRIC_RELOAD_INTERVAL=5
+# Session vector segments on disk (leave VECTOR_DATA_DIR empty for memory only)
+VECTOR_DATA_DIR=
+VECTOR_MAX_HOT_SESSIONS=64
+# Seconds a completed session's vectors are kept, and the budget for resident session data
+VECTOR_SESSION_TTL=3600
+VECTOR_MEMORY_BUDGET_BYTES=268435456
+VECTOR_RETENTION_INTERVAL=60
+# Write-behind batching of stored responses
+VECTOR_WRITE_BATCH_SIZE=64
+VECTOR_WRITE_BATCH_DELAY_MS=5
+# Response embeddings (hashing is a deterministic local n-gram vectorizer)
+EMBEDDING_BACKEND=hashing
+EMBEDDING_CACHE_SIZE=10000
+# Cross-session response index (NLIST empty sizes it automatically)
+VECTOR_INDEX_NLIST=
+VECTOR_INDEX_NPROBE=8
+VECTOR_INDEX_TRAIN_THRESHOLD=1024
+# none, float16 or int8 (see scripts/benchmark_quantization.py)
+VECTOR_INDEX_QUANTIZATION=none
+VECTOR_INDEX_RERANK_FACTOR=4
+VECTOR_INDEX_PATH=
+# Oldest rows age out past this; the index also counts against VECTOR_MEMORY_BUDGET_BYTES
+VECTOR_INDEX_MAX_VECTORS=200000
 
 # Database
 DATABASE_URL=sqlite:///./interview_platform.db
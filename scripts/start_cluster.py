@@ -0,0 +1,53 @@
+import os
+import subprocess
+import sys
+import time
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+def main():
+    """Run one backend worker per core behind the session router"""
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count() or 1
+    router_port = int(os.getenv("ROUTER_PORT", "8000"))
+    base_port = int(os.getenv("WORKER_BASE_PORT", "8100"))
+    worker_urls = ",".join(f"http://127.0.0.1:{base_port + shard}" for shard in range(workers))
+    
+    # Workers share session snapshots and status through the session store
+    env = {**os.environ, "WORKER_URLS": worker_urls}
+    if env.get("SESSION_STORE", "memory") == "memory":
+        env["SESSION_STORE"] = "sqlite"
+    elif env["SESSION_STORE"] == "redis" and not env.get("REDIS_URL"):
+        # Without a server each worker would get its own private stand-in
+        sys.exit("✗ SESSION_STORE=redis needs REDIS_URL in multi-worker mode")
+    
+    # The router's socket faces clients, so it negotiates permessage-deflate; worker hops are loopback
+    deflate = ["--ws-per-message-deflate", os.getenv("WS_PER_MESSAGE_DEFLATE", "true").lower()]
+    
+    print(f"🚀 Starting {workers} workers behind the router on :{router_port}")
+    processes = []
+    for shard in range(workers):
+        processes.append(subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(base_port + shard), "--ws-per-message-deflate", "false"],
+            env={**env, "WORKER_SHARD": str(shard)}
+        ))
+    processes.append(subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.router:app", "--host", "0.0.0.0", "--port", str(router_port), *deflate],
+        env=env
+    ))
+    
+    try:
+        while all(process.poll() is None for process in processes):
+            time.sleep(1)
+        print("✗ A worker exited; stopping the cluster")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import asyncio
+
+import pytest
+
+from backend.services.execution_cache import ExecutionCache
+from backend.services.judge0 import Judge0Service
+
+ACCEPTED = {"status": "Accepted", "passed": True, "output": "ok", "error": "", "time": 0.01, "memory": 100}
+
+def make_service(run_delay: float = 0.05) -> Judge0Service:
+    """A service whose sandbox is a fake that accepts every case after run_delay"""
+    service = Judge0Service()
+    service.backend = "local"
+    service.runs = 0
+
+    async def run_test_cases(source_code, language, test_cases, time_limit, on_result=None):
+        service.runs += 1
+        await asyncio.sleep(run_delay)
+        return [{"test_case": i + 1, **ACCEPTED} for i in range(len(test_cases))]
+
+    service.run_test_cases = run_test_cases
+    return service
+
+CASES = [{"input": "1", "expected": "ok"}, {"input": "2", "expected": "ok"}]
+
+def test_claim_coalesces_and_release_shares_result():
+    async def scenario():
+        cache = ExecutionCache()
+        assert cache.claim("k") is None
+        waiter = cache.claim("k")
+        assert waiter is not None
+        cache.release("k", ACCEPTED)
+        assert await waiter == ACCEPTED
+        assert cache.inflight == {}
+        assert cache.counters["coalesced"] == 1
+
+    asyncio.run(scenario())
+
+def test_cancelled_owner_fails_waiters_instead_of_cancelling_them():
+    async def scenario():
+        cache = ExecutionCache()
+        cache.claim("k")
+        waiter = cache.claim("k")
+        cache.release("k", error=asyncio.CancelledError())
+        with pytest.raises(RuntimeError):
+            await waiter
+
+    asyncio.run(scenario())
+
+def test_cancelling_a_streamed_run_releases_its_claims():
+    async def scenario():
+        service = make_service()
+        # Case 2 is a cache hit whose streamed result blocks; case 1 is claimed first
+        hit_key = service.cache.make_key("code", service.language_ids["python"], "2", "ok", 5,
+                                         service.memory_limit, "exact")
+        await service.cache.put(hit_key, ACCEPTED)
+
+        async def stuck(result):
+            await asyncio.sleep(10)
+
+        task = asyncio.create_task(service.execute_code("code", "python", CASES, on_result=stuck))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert service.cache.inflight == {}
+
+        # The identical run must not wait on the abandoned claim
+        execution = await asyncio.wait_for(service.execute_code("code", "python", CASES), 2)
+        assert execution["summary"]["passed"] == 2
+
+    asyncio.run(scenario())
+
+def test_identical_concurrent_runs_execute_once():
+    async def scenario():
+        service = make_service()
+        first, second = await asyncio.gather(
+            service.execute_code("code", "python", CASES),
+            service.execute_code("code", "python", CASES)
+        )
+        assert service.runs == 1
+        assert first["summary"] == second["summary"]
+        assert service.cache.inflight == {}
+
+    asyncio.run(scenario())
+
+def test_rejected_run_releases_claims():
+    async def scenario():
+        service = make_service()
+        service.scheduler.max_queue_per_session = 0
+        execution = await service.execute_code("code", "python", CASES, session_id="s")
+        assert "retry_after" in execution
+        assert service.cache.inflight == {}
+
+    asyncio.run(scenario())
+
+def test_only_deterministic_verdicts_are_cacheable():
+    service = Judge0Service()
+    for status in ("Accepted", "Wrong Answer", "Compilation Error", "Runtime Error (NZEC)", "Runtime Error (SIGSEGV)"):
+        assert service.is_cacheable({"status": status})
+    for status in ("Time Limit Exceeded", "Internal Error", "Exec Format Error", "error", "Timeout", "Unknown", None):
+        assert not service.is_cacheable({"status": status})
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+from backend.services.execution_scheduler import ExecutionRejected, ExecutionScheduler
+
+async def hold(scheduler, session_id, priority, started, release):
+    async with scheduler.slot(session_id, priority):
+        started.append(session_id)
+        await release.wait()
+
+def test_rejects_when_session_queue_is_full():
+    async def scenario():
+        scheduler = ExecutionScheduler(max_slots=1, max_queue_per_session=1)
+        release = asyncio.Event()
+        started = []
+        holder = asyncio.create_task(hold(scheduler, "a", "practice", started, release))
+        queued = asyncio.create_task(hold(scheduler, "b", "practice", started, release))
+        await asyncio.sleep(0)
+
+        with pytest.raises(ExecutionRejected) as rejected:
+            async with scheduler.slot("b"):
+                pass
+        assert rejected.value.retry_after >= 1
+        assert scheduler.counters["rejected"] == 1
+
+        release.set()
+        await asyncio.gather(holder, queued)
+        assert scheduler.slots_in_use == 0
+
+    asyncio.run(scenario())
+
+def test_cancel_while_queued_frees_the_queue_spot():
+    async def scenario():
+        scheduler = ExecutionScheduler(max_slots=1, max_queue_per_session=1)
+        release = asyncio.Event()
+        started = []
+        holder = asyncio.create_task(hold(scheduler, "a", "practice", started, release))
+        waiting = asyncio.create_task(hold(scheduler, "b", "practice", started, release))
+        await asyncio.sleep(0)
+
+        waiting.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+        assert scheduler.queued == 0
+        assert scheduler.counters["cancelled"] == 1
+
+        # The session may queue again, and nothing leaked a slot
+        again = asyncio.create_task(hold(scheduler, "b", "practice", started, release))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, again)
+        assert started == ["a", "b"]
+        assert scheduler.slots_in_use == 0
+
+    asyncio.run(scenario())
+
+def test_submissions_are_dispatched_before_practice_runs():
+    async def scenario():
+        scheduler = ExecutionScheduler(max_slots=1)
+        release = asyncio.Event()
+        started = []
+        holder = asyncio.create_task(hold(scheduler, "a", "practice", started, release))
+        await asyncio.sleep(0)
+        practice = asyncio.create_task(hold(scheduler, "b", "practice", started, release))
+        await asyncio.sleep(0)
+        submission = asyncio.create_task(hold(scheduler, "c", "submission", started, release))
+        await asyncio.sleep(0)
+
+        release.set()
+        await asyncio.gather(holder, practice, submission)
+        assert started == ["a", "c", "b"]
+
+    asyncio.run(scenario())
+
+def test_slot_is_released_when_the_block_fails():
+    async def scenario():
+        scheduler = ExecutionScheduler(max_slots=1)
+        with pytest.raises(ValueError):
+            async with scheduler.slot("a"):
+                raise ValueError("boom")
+        assert scheduler.slots_in_use == 0
+        async with scheduler.slot("a"):
+            assert scheduler.slots_in_use == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from backend.services.message_pipeline import MessagePipeline
+
+def make_pipeline(**kwargs):
+    finished = []
+
+    async def handle(message):
+        await asyncio.sleep(message["seconds"])
+        finished.append(message["id"])
+        return {"id": message["id"]}
+
+    return MessagePipeline(handle, **kwargs), finished
+
+def test_messages_of_one_lane_run_in_order():
+    async def scenario():
+        pipeline, finished = make_pipeline()
+        futures = [await pipeline.submit("coding", {"id": i, "seconds": 0.01 * (3 - i)}) for i in range(3)]
+        assert [(await f)["id"] for f in futures] == [0, 1, 2]
+        assert finished == [0, 1, 2]
+        await pipeline.close()
+
+    asyncio.run(scenario())
+
+def test_close_drops_queued_messages_and_lets_running_ones_finish():
+    async def scenario():
+        pipeline, finished = make_pipeline(max_concurrency=1)
+        running = await pipeline.submit("coding", {"id": 1, "seconds": 0.1})
+        queued = await pipeline.submit("coding", {"id": 2, "seconds": 0})
+        # Dequeued by its lane but still waiting for the only slot
+        waiting = await pipeline.submit("behavioral", {"id": 3, "seconds": 0})
+        await asyncio.sleep(0.01)
+
+        await pipeline.close()
+        assert running.result() == {"id": 1}
+        assert queued.cancelled() and waiting.cancelled()
+        assert finished == [1]
+        assert pipeline.counters["dropped"] == 2
+
+    asyncio.run(scenario())
+
+def test_close_cancels_handlers_that_outlive_the_timeout():
+    async def scenario():
+        pipeline, finished = make_pipeline(close_timeout=0.05)
+        stuck = await pipeline.submit("coding", {"id": 1, "seconds": 10})
+        await asyncio.sleep(0.01)
+        await pipeline.close()
+        assert stuck.cancelled()
+        assert finished == []
+
+    asyncio.run(scenario())
+
+def test_submit_after_close_is_refused():
+    async def scenario():
+        pipeline, _ = make_pipeline()
+        await pipeline.close()
+        with pytest.raises(RuntimeError):
+            await pipeline.submit("coding", {"id": 1, "seconds": 0})
+
+    asyncio.run(scenario())
+
+def test_handler_errors_become_error_replies():
+    async def scenario():
+        async def handle(message):
+            raise ValueError("bad payload")
+
+        pipeline = MessagePipeline(handle)
+        reply = await (await pipeline.submit("coding", {}))
+        assert "bad payload" in reply["error"]
+        assert pipeline.counters["failed"] == 1
+        await pipeline.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,78 @@
+import asyncio
+
+from backend.agents.coding import CodingAgent
+from backend.agents.registry import AgentRegistry
+from backend.models.interview import InterviewConfig, InterviewSession
+from backend.services.session_store import SessionStore, SQLiteSessionBackend
+
+CONFIG = InterviewConfig(role="Backend", difficulty="mid", languages_allowed=["python"], duration_minutes=45,
+                         realtime_hints=False, voice="alloy", rubric_id="backend_v3", video_avatar="none")
+
+FACTORIES = {"coding": lambda session_id: CodingAgent(session_id, None)}
+
+def build_agents(session: InterviewSession):
+    state = session.agents if isinstance(session.agents, dict) else None
+    session.agents = AgentRegistry(session.session_id, FACTORIES, state)
+
+def make_session(session_id: str) -> InterviewSession:
+    session = InterviewSession(session_id=session_id, config=CONFIG, status="active")
+    build_agents(session)
+    return session
+
+def test_without_a_backend_unfinished_sessions_are_never_evicted():
+    async def scenario():
+        store = SessionStore(None, max_sessions=2, idle_ttl=0)
+        for i in range(3):
+            await store.put(make_session(f"s{i}"))
+        assert await store.get("s0") is not None
+        assert store.stats()["over_budget"] == 1
+
+        await store.sweep()
+        assert len(store) == 3
+
+    asyncio.run(scenario())
+
+def test_without_a_backend_completed_sessions_are_evicted_first():
+    async def scenario():
+        store = SessionStore(None, max_sessions=2)
+        await store.put(make_session("s0"))
+        await store.put(make_session("s1"))
+        await store.complete("s0")
+        await store.put(make_session("s2"))
+        assert list(store.sessions) == ["s1", "s2"]
+        assert store.stats()["over_budget"] == 0
+
+    asyncio.run(scenario())
+
+def test_agent_state_survives_eviction_and_restore(tmp_path):
+    async def scenario():
+        store = SessionStore(SQLiteSessionBackend(str(tmp_path / "sessions.db")), restore=build_agents, max_sessions=1)
+        session = make_session("s0")
+        session.agents["coding"].final_submissions = 2
+        await store.put(session)
+        await store.put(make_session("s1"))
+        assert "s0" not in store.sessions
+
+        restored = await store.get("s0")
+        assert restored is not session
+        assert restored.agents["coding"].final_submissions == 2
+        await store.close()
+
+    asyncio.run(scenario())
+
+def test_session_pinned_during_save_stays_in_memory(tmp_path):
+    async def scenario():
+        store = SessionStore(SQLiteSessionBackend(str(tmp_path / "sessions.db")), max_sessions=10)
+        await store.put(make_session("s0"))
+        save = store.backend.save
+
+        async def save_while_a_socket_connects(session, ttl=None):
+            store.pin(session.session_id)
+            await save(session, ttl)
+
+        store.backend.save = save_while_a_socket_connects
+        assert not await store.evict("s0")
+        assert "s0" in store.sessions
+        await store.close()
+
+    asyncio.run(scenario())
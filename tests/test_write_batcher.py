@@ -0,0 +1,60 @@
+import asyncio
+
+from backend.services.write_batcher import WriteBehindBatcher
+
+def make_batcher(fail: bool = False, delay: float = 0):
+    batches = []
+
+    async def apply_batch(batch):
+        await asyncio.sleep(delay)
+        if fail:
+            raise RuntimeError("store unavailable")
+        batches.append(batch)
+
+    return WriteBehindBatcher(apply_batch, max_batch=8, max_delay=0.01), batches
+
+def test_writes_are_applied_in_one_batch_and_flush_waits_for_them():
+    async def scenario():
+        batcher, batches = make_batcher()
+        futures = [batcher.submit("s", i) for i in range(3)]
+        assert await batcher.flush("s")
+        assert all(f.result() for f in futures)
+        assert batches == [[("s", 0), ("s", 1), ("s", 2)]]
+        await batcher.close()
+
+    asyncio.run(scenario())
+
+def test_failed_batch_resolves_false():
+    async def scenario():
+        batcher, _ = make_batcher(fail=True)
+        future = batcher.submit("s", 1)
+        assert not await batcher.flush("s")
+        assert future.result() is False
+        assert batcher.counters["failed"] == 1
+        await batcher.close()
+
+    asyncio.run(scenario())
+
+def test_close_applies_pending_writes():
+    async def scenario():
+        batcher, batches = make_batcher()
+        future = batcher.submit("s", 1)
+        await batcher.close()
+        assert future.result() is True
+        assert batches == [[("s", 1)]]
+        assert batcher.worker is None
+
+    asyncio.run(scenario())
+
+def test_cancelled_flush_does_not_cancel_the_writes():
+    async def scenario():
+        batcher, batches = make_batcher(delay=0.05)
+        future = batcher.submit("s", 1)
+        flush = asyncio.create_task(batcher.flush("s"))
+        await asyncio.sleep(0.02)
+        flush.cancel()
+        assert await future is True
+        assert batches == [[("s", 1)]]
+        await batcher.close()
+
+    asyncio.run(scenario())